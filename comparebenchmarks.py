@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Compares the benchmark reports (reports/benchmarks.json) of two Qt packages. Used by the recipe and standalone:
+# python comparebenchmarks.py <baseline benchmarks.json> <benchmarks.json> [threshold]
+
+import json
+import sys
+
+# Two-sided 95% critical values of the Student t distribution for 1..30 degrees of freedom
+T_CRITICAL_95 = [12.71, 4.30, 3.18, 2.78, 2.57, 2.45, 2.36, 2.31, 2.26, 2.23, 2.20, 2.18, 2.16, 2.14, 2.13, 2.12, 2.11, 2.10, 2.09, 2.09, 2.08, 2.07, 2.07, 2.06, 2.06, 2.06, 2.05, 2.05, 2.05, 2.04]
+
+def comparebenchmarks(baseline, results):
+    # Compares the samples of every benchmark present in both result sets. Returns the relative change of the mean
+    # (results / baseline - 1) and whether the change is statistically significant (Welch's t-test, 95%).
+    comparison = {}
+    for name, result in results.items():
+        if name not in baseline or baseline[name]["metric"] != result["metric"]:
+            continue
+        old, new = baseline[name]["samples"], result["samples"]
+        old_mean, new_mean = sum(old) / len(old), sum(new) / len(new)
+        if old_mean <= 0:
+            continue
+        significant = False
+        if len(old) > 1 and len(new) > 1:
+            old_var = sum((x - old_mean) ** 2 for x in old) / (len(old) - 1) / len(old)
+            new_var = sum((x - new_mean) ** 2 for x in new) / (len(new) - 1) / len(new)
+            if old_var + new_var == 0:
+                significant = old_mean != new_mean
+            else:
+                t = abs(new_mean - old_mean) / (old_var + new_var) ** 0.5
+                dof = (old_var + new_var) ** 2 / ((old_var ** 2 / (len(old) - 1) if old_var else 0) + (new_var ** 2 / (len(new) - 1) if new_var else 0))
+                significant = t > (T_CRITICAL_95[int(dof) - 1] if 1 <= dof <= 30 else 1.96)
+        comparison[name] = {"metric": result["metric"], "baseline": old_mean, "value": new_mean, "delta": new_mean / old_mean - 1, "significant": significant}
+    return comparison
+
+def main(argv):
+    # Exits with 1 if a significant regression above the threshold is found
+    if len(argv) not in [3, 4]:
+        sys.exit("usage: %s <baseline benchmarks.json> <benchmarks.json> [threshold, default 0.05]" % argv[0])
+    with open(argv[1], 'r') as f:
+        baseline = json.load(f)["results"]
+    with open(argv[2], 'r') as f:
+        results = json.load(f)["results"]
+    threshold = float(argv[3]) if len(argv) == 4 else 0.05
+    regressions = 0
+    for name, entry in sorted(comparebenchmarks(baseline, results).items(), key=lambda item: item[1]["delta"], reverse=True):
+        regression = entry["significant"] and entry["delta"] > threshold
+        regressions += regression
+        print("%-10s %-80s %14.2f -> %14.2f %s %+7.1f%%" % ("REGRESSION" if regression else "", name, entry["baseline"], entry["value"], entry["metric"], entry["delta"] * 100))
+    print("%u significant regression(s) above %.0f%%" % (regressions, threshold * 100))
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main(sys.argv)
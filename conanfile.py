@@ -3,43 +3,667 @@
 
 from conan import ConanFile
 from conan.tools.cmake import CMake, CMakeToolchain
-from conan.tools.files import patch, get, rmdir, replace_in_file, download
-from conan.tools.build import cross_building
+from conan.tools.files import patch, replace_in_file, copy
+from conan.tools.build import cross_building, build_jobs
 from conan.tools.system.package_manager import Apt
-from conan.tools.env import VirtualBuildEnv
+from conan.tools.env import VirtualBuildEnv, Environment
+from conan.tools.gnu import PkgConfigDeps
+from conan.errors import ConanException, ConanInvalidConfiguration
 import json, os
+import concurrent.futures
 import configparser
-import tempfile
+import fnmatch
+import hashlib
+import glob
 import http.client
+import io
+import re
+import shutil
+import socket
+import struct
+import subprocess
+import sys
+import tarfile
+import time
+import urllib.parse
+import urllib.request
+import xml.etree.ElementTree as ET
+from comparebenchmarks import comparebenchmarks
 
-required_conan_version = ">=2.0"
+required_conan_version = ">=2.1"
+
+# The parsed .gitmodules of the qt5 super repo is cached per Qt version in qtmodules/<version>.json and exported
+# together with the recipe, so loading the recipe doesn't need any network access. Set QT_CONAN_REFRESH_SUBMODULES=1
+# to fetch the .gitmodules again. QT_CONAN_SUBMODULES_URL overrides the url (%s is replaced by the Qt version).
+SUBMODULES_URL = "https://raw.githubusercontent.com/qt/qt5/refs/heads/%s/.gitmodules"
+SUBMODULES_CACHE_FORMAT = 1
+
+def parsesubmodules(content):
+    config = configparser.ConfigParser()
+    config.read_string(content)
+    res = {}
+    assert config.sections()
+    for s in config.sections():
+        section = str(s)
+        assert section.startswith("submodule ")
+        assert section.count('"') == 2
+        modulename = section[section.find('"') + 1 : section.rfind('"')]
+        res[modulename] = {"branch":str(config.get(section, "branch")), "status":str(config.get(section, "status")), "path":str(config.get(section, "path"))}
+        if config.has_option(section, "depends"):
+            res[modulename]["depends"] = [str(i) for i in config.get(section, "depends").split()]
+        else:
+            res[modulename]["depends"] = []
+    return res
+
+def fetchsubmodules(version, cache_file):
+    url = os.environ.get("QT_CONAN_SUBMODULES_URL", SUBMODULES_URL) % str(version)
+    with urllib.request.urlopen(url, timeout=60) as r:
+        content = r.read()
+    cache = {"format": SUBMODULES_CACHE_FORMAT, "version": str(version), "url": url, "sha256": hashlib.sha256(content).hexdigest(), "submodules": parsesubmodules(content.decode("utf-8"))}
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    with open(cache_file + ".tmp", 'w') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(cache_file + ".tmp", cache_file)
+    return cache
 
 def getsubmodules(version, status_filter=None):
-    with tempfile.TemporaryDirectory() as tmpdirname:
-        config = configparser.ConfigParser()
-        with open(os.path.join(tmpdirname, "qtmodules.conf"), 'wb') as f:
-            conn = http.client.HTTPSConnection("raw.githubusercontent.com")
-            conn.request("GET", "/qt/qt5/refs/heads/%s/.gitmodules" % str(version))
-            r1 = conn.getresponse()
-            f.write(r1.read())
-            f.close()
-            conn.close()
-            config.read(os.path.join(tmpdirname, "qtmodules.conf"))
-            res = {}
-            assert config.sections()
-            for s in config.sections():
-                section = str(s)
-                assert section.startswith("submodule ")
-                assert section.count('"') == 2
-                modulename = section[section.find('"') + 1 : section.rfind('"')]
-                status = str(config.get(section, "status"))
-                if (status_filter == None and status != "obsolete" and status != "ignore") or (status_filter != None and status == status_filter):
-                    res[modulename] = {"branch":str(config.get(section, "branch")), "status":status, "path":str(config.get(section, "path"))}
-                    if config.has_option(section, "depends"):
-                        res[modulename]["depends"] = [str(i) for i in config.get(section, "depends").split()]
-                    else:
-                        res[modulename]["depends"] = []
-            return res
+    cache_file = os.path.join("qtmodules", "%s.json" % str(version))
+    cache = None
+    if os.environ.get("QT_CONAN_REFRESH_SUBMODULES", "0").lower() not in ["1", "true", "yes"] and os.path.isfile(cache_file):
+        with open(cache_file, 'r') as f:
+            cache = json.load(f)
+        if cache.get("format") != SUBMODULES_CACHE_FORMAT or cache.get("version") != str(version):
+            cache = None
+    if cache is None:
+        cache = fetchsubmodules(version, cache_file)
+    res = {}
+    for modulename, module in cache["submodules"].items():
+        status = module["status"]
+        if (status_filter == None and status != "obsolete" and status != "ignore") or (status_filter != None and status == status_filter):
+            res[modulename] = module
+    return res
+
+def resolvesubmodules(submodules, requested):
+    # Returns the transitive closure of the requested modules over the "depends" graph in build order (dependencies
+    # first) and the dependencies that are not part of the module table (e.g. obsolete or ignored modules).
+    order = []
+    unknown = set()
+    state = {}
+    def visit(module, path):
+        if state.get(module) == "done":
+            return
+        if state.get(module) == "visiting":
+            raise ConanException("Cyclic Qt submodule dependency: %s" % " -> ".join(path + [module]))
+        state[module] = "visiting"
+        for dependency in submodules[module]["depends"]:
+            if dependency in submodules:
+                visit(dependency, path + [module])
+            else:
+                unknown.add(dependency)
+        state[module] = "done"
+        order.append(module)
+    for module in sorted(requested):
+        if module not in submodules:
+            raise ConanException("Unknown Qt submodule: %s" % module)
+        visit(module, [])
+    return order, sorted(unknown)
+
+def extractsources(tarball, destination, skip_dirs=(), only_dirs=None):
+    # Decodes the tarball as a single stream and only writes the members that are not located in one of the skipped top
+    # level directories (after stripping the root folder). only_dirs ({directory: name}) restricts the extraction to the
+    # given top level directories and extracts each of them under the given name. Returns a report of what was written
+    # and skipped.
+    report = {"files": 0, "bytes_written": 0, "bytes_skipped": 0, "skipped_dirs": sorted(skip_dirs)}
+    # The "data" filter (Python >= 3.12, backported to 3.8.17+) also rejects links out of the destination and special files
+    extract_args = {"filter": "data"} if hasattr(tarfile, "data_filter") else {}
+    def rename(path):
+        top = path.split("/", 1)[0]
+        return only_dirs[top] + path[len(top):] if only_dirs and top in only_dirs else path
+    start = time.monotonic()
+    with tarfile.open(tarball, mode="r|xz") as tar:
+        for member in tar:
+            parts = member.name.split("/", 1)
+            if len(parts) < 2 or not parts[1]:
+                continue # the root folder itself
+            name = parts[1]
+            if name.startswith("/") or ".." in name.split("/"):
+                raise ConanException("Refusing to extract %s from %s" % (member.name, tarball))
+            top = name.split("/", 1)[0]
+            if top in skip_dirs or (only_dirs is not None and top not in only_dirs):
+                report["bytes_skipped"] += member.size
+                continue
+            member.name = rename(name)
+            if member.islnk():
+                member.linkname = rename(member.linkname.split("/", 1)[-1])
+            try:
+                tar.extract(member, destination, set_attrs=not member.isdir(), **extract_args)
+            except tarfile.TarError as e:
+                raise ConanException("Refusing to extract %s from %s: %s" % (name, tarball, e))
+            if member.isfile():
+                report["files"] += 1
+                report["bytes_written"] += member.size
+    report["seconds"] = round(time.monotonic() - start, 2)
+    return report
+
+def physicalmemory():
+    # Returns the physical memory in bytes available to this process (respecting a cgroup v2 limit) or None
+    memory = None
+    try:
+        if os.name == "nt":
+            import ctypes
+            class MEMORYSTATUSEX(ctypes.Structure):
+                _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong), ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                            ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong), ("ullTotalVirtual", ctypes.c_ulonglong),
+                            ("ullAvailVirtual", ctypes.c_ulonglong), ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+            status = MEMORYSTATUSEX()
+            status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+            if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+                memory = status.ullTotalPhys
+        else:
+            memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/memory.max", 'r') as f:
+            limit = f.read().strip()
+        if limit.isdigit():
+            memory = min(memory, int(limit)) if memory else int(limit)
+    except OSError:
+        pass
+    return memory
+
+def childpeakmemory():
+    # Returns the peak resident memory (MiB) of the largest child process this process waited for so far (including
+    # their descendants) or None. The value can't be reset, so a build's peak is only known if it raised the value.
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / (1048576 if sys.platform == "darwin" else 1024)
+
+def readcmakecache(cache_file):
+    # Returns {name: (type, value)} of a CMakeCache.txt
+    entries = {}
+    with open(cache_file, 'r') as f:
+        for line in f:
+            match = re.match(r"^([A-Za-z_][A-Za-z0-9_.+-]*):([A-Z]+)=(.*)$", line.rstrip("\n"))
+            if match:
+                entries[match.group(1)] = (match.group(2), match.group(3))
+    return entries
+
+def linktree(src, dst, hardlinks=True):
+    # Materializes the tree src at dst with reflinks (copy-on-write clones) if the filesystem supports them, with
+    # hardlinks otherwise (unless disabled because dst is modified later) and with copies as last resort (e.g. across
+    # devices). A single file is linked the same way.
+    mode = {"value": "reflink"}
+    def link(s, d):
+        if mode["value"] == "reflink":
+            try:
+                import fcntl
+                with open(s, 'rb') as fs, open(d, 'wb') as fd:
+                    fcntl.ioctl(fd.fileno(), 0x40049409, fs.fileno()) # FICLONE
+                shutil.copystat(s, d)
+                return d
+            except (ImportError, OSError):
+                if os.path.exists(d):
+                    os.remove(d)
+                mode["value"] = "hardlink" if hardlinks else "copy"
+        if mode["value"] == "hardlink":
+            try:
+                os.link(s, d)
+                return d
+            except OSError:
+                mode["value"] = "copy"
+        return shutil.copy2(s, d)
+    if os.path.isdir(src):
+        shutil.copytree(src, dst, symlinks=True, copy_function=link, dirs_exist_ok=True)
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(dst)), exist_ok=True)
+        link(src, dst)
+
+def fetchsha256(url, store, urlopen=urllib.request.urlopen):
+    # Returns the sha256 published next to the artifact (<url>.sha256, "<hash>  <file>") by its origin. The hash is
+    # recorded in <store>/index, so the artifact store can be used without network access afterwards.
+    name = os.path.basename(urllib.parse.urlsplit(url).path)
+    index_file = os.path.join(store, "index", name + ".sha256")
+    if os.path.isfile(index_file):
+        with open(index_file, 'r') as f:
+            return f.read().strip()
+    try:
+        with urlopen(url + ".sha256", timeout=60) as response:
+            sha256 = response.read(4096).decode("utf-8", "replace").split()[0].lower()
+    except (OSError, ValueError, IndexError, http.client.HTTPException) as e:
+        raise ConanException("Failed to get the sha256 of %s from %s.sha256 (%s) - declare it in conandata.yml" % (name, url, e))
+    if not re.fullmatch("[0-9a-f]{64}", sha256):
+        raise ConanException("%s.sha256 doesn't contain a sha256 - declare it in conandata.yml" % url)
+    os.makedirs(os.path.dirname(index_file), exist_ok=True)
+    with open(index_file, 'w') as f:
+        f.write(sha256)
+    return sha256
+
+def fetchartifact(urls, sha256, store, jobs=4, chunk_size=16 * 1048576, urlopen=urllib.request.urlopen):
+    # Downloads the artifact from the first of the (mirror) urls that delivers it with the expected sha256 into the
+    # content addressed store and returns its path and a report. Servers that accept range requests are fetched in up to
+    # jobs parallel chunks. The chunks are kept in <store>/partial until the download is complete, so an interrupted
+    # download is resumed.
+    name = os.path.basename(urllib.parse.urlsplit(urls[0]).path)
+    if not sha256:
+        raise ConanException("No sha256 of %s given" % name)
+    report = {"name": name, "sha256": sha256, "cached": False, "url": None, "bytes": 0, "resumed_bytes": 0, "chunks": 0, "failed": []}
+    start = time.monotonic()
+    if os.path.isfile(os.path.join(store, sha256)):
+        report["cached"] = True
+        return os.path.join(store, sha256), report
+    partial = os.path.join(store, "partial", name)
+    os.makedirs(os.path.dirname(partial), exist_ok=True)
+
+    def fetchchunk(url, part, first, last):
+        have = os.path.getsize(part) if os.path.isfile(part) else 0
+        if first + have > last:
+            return 0, have
+        request = urllib.request.Request(url, headers={"Range": "bytes=%u-%u" % (first + have, last)})
+        with urlopen(request, timeout=60) as response, open(part, 'ab') as f:
+            if response.status != 206:
+                raise ValueError("the server ignored the range request")
+            written = 0
+            while True:
+                block = response.read(1048576)
+                if not block:
+                    break
+                f.write(block)
+                written += len(block)
+        if have + written != last - first + 1:
+            raise ValueError("incomplete chunk %s" % os.path.basename(part))
+        return written, have
+
+    def fetch(url):
+        if urllib.parse.urlsplit(url).scheme == "file":
+            shutil.copyfile(urllib.request.url2pathname(urllib.parse.urlsplit(url).path), partial)
+            return
+        with urlopen(urllib.request.Request(url, method="HEAD"), timeout=60) as response:
+            size = int(response.headers.get("Content-Length") or 0)
+            ranges = response.headers.get("Accept-Ranges") == "bytes"
+        if not ranges or not size:
+            with urlopen(url, timeout=60) as response, open(partial, 'wb') as f:
+                shutil.copyfileobj(response, f, 1048576)
+                report["bytes"] += f.tell()
+            return
+        count = max(1, min(jobs, (size + chunk_size - 1) // chunk_size))
+        layout = {"size": size, "chunks": count}
+        layout_file = partial + ".json"
+        if os.path.isfile(layout_file):
+            with open(layout_file, 'r') as f:
+                if json.load(f) != layout:
+                    for part in glob.glob(glob.escape(partial) + ".part*"):
+                        os.remove(part)
+        with open(layout_file, 'w') as f:
+            json.dump(layout, f)
+        bounds = [(i * size // count, (i + 1) * size // count - 1) for i in range(count)]
+        parts = ["%s.part%u" % (partial, i) for i in range(count)]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=count) as executor:
+            for written, resumed in executor.map(lambda args: fetchchunk(url, *args), [(part, first, last) for part, (first, last) in zip(parts, bounds)]):
+                report["bytes"] += written
+                report["resumed_bytes"] += resumed
+        report["chunks"] = count
+        with open(partial, 'wb') as f:
+            for part in parts:
+                with open(part, 'rb') as p:
+                    shutil.copyfileobj(p, f, 1048576)
+        for part in parts + [layout_file]:
+            os.remove(part)
+
+    for url in urls:
+        try:
+            fetch(url)
+        except (OSError, ValueError, http.client.HTTPException) as e:
+            # http.client.IncompleteRead if a mirror closes the connection early
+            report["failed"].append("%s: %s" % (url, e))
+            continue
+        digest = hashlib.sha256()
+        with open(partial, 'rb') as f:
+            for block in iter(lambda: f.read(1048576), b""):
+                digest.update(block)
+        if digest.hexdigest() != sha256:
+            report["failed"].append("%s: sha256 %s does not match %s" % (url, digest.hexdigest(), sha256))
+            os.remove(partial)
+            continue
+        os.replace(partial, os.path.join(store, sha256))
+        report.update({"url": url, "seconds": round(time.monotonic() - start, 2)})
+        return os.path.join(store, sha256), report
+    raise ConanException("Failed to download %s:\n%s" % (name, "\n".join(report["failed"])))
+
+def ninjalinkedges(build_file):
+    # Maps the outputs of the link edges of a CMake generated build.ninja to (kind, module, target): "link" with the
+    # module and target of the linked objects (<module>/.../CMakeFiles/<target>.dir/...) - the libraries, plugins and
+    # executables of all modules land in qtbase/lib, qtbase/plugins, ... in a top level build - or "symlink" for the
+    # library and executable symlinks CMake creates in a separate edge.
+    edges = {}
+    with open(build_file, 'r', errors="replace") as f:
+        for line in f:
+            if not line.startswith("build ") or ("_LINKER__" not in line and "CMAKE_SYMLINK_" not in line):
+                continue
+            # $ escapes spaces, colons and itself in paths
+            line = line[6:].rstrip("\n").replace("$$", "\x02").replace("$ ", "\x00").replace("$:", "\x01")
+            outputs, _, inputs = line.partition(":")
+            unescape = lambda path: path.replace("\x00", " ").replace("\x01", ":").replace("\x02", "$")
+            fields = inputs.split()
+            if not fields:
+                continue
+            if fields[0].startswith("CMAKE_SYMLINK_"):
+                value = ("symlink", None, None)
+            elif "_LINKER__" in fields[0]:
+                objects = [unescape(path) for path in fields[1:] if "/CMakeFiles/" in path and ".dir/" in path]
+                if not objects:
+                    continue
+                parts = objects[0].split("/")
+                target = next(part[:-4] for part in parts if part.endswith(".dir"))
+                value = ("link", parts[0], target)
+            else:
+                continue
+            for output in outputs.split():
+                if output != "|":
+                    edges[unescape(output)] = value
+    return edges
+
+def analyzeninjalog(log_file, modules, top=200):
+    # Aggregates the durations of the .ninja_log entries of the last build of every output per Qt submodule, per target
+    # and per translation unit. Outputs are classified as compile (object files), link (libraries, executables,
+    # plugins) or other (code generators, custom commands) steps. An edge with several outputs is logged once per output
+    # with the same start, end and command hash and is counted once. The link steps are attributed to the module of
+    # their objects with the build.ninja next to the log, symlink steps are not counted.
+    latest = {}
+    with open(log_file, 'r') as f:
+        for line in f:
+            if line.startswith("#"):
+                continue
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) >= 4:
+                latest[fields[3]] = (int(fields[0]), int(fields[1]), fields[4] if len(fields) >= 5 else fields[3])
+    steps = {}
+    for output, step in latest.items():
+        steps.setdefault(step, []).append(output)
+    build_file = os.path.join(os.path.dirname(log_file), "build.ninja")
+    link_edges = ninjalinkedges(build_file) if os.path.isfile(build_file) else None
+    report = {"modules": {}, "targets": {}, "translation_units": [], "wall_seconds": 0, "cpu_seconds": 0, "steps": 0}
+    if not steps:
+        return report
+    report["wall_seconds"] = (max(end for _, end, _ in steps) - min(start for start, _, _ in steps)) / 1000
+    units = []
+    for (start, end, _), outputs in steps.items():
+        seconds = (end - start) / 1000
+        output = sorted(outputs)[0]
+        parts = output.replace("\\", "/").split("/")
+        module = parts[0] if parts[0] in modules else "other"
+        target_dir = next((part for part in parts if part.endswith(".dir")), None)
+        edge = next((link_edges[o] for o in outputs if o in link_edges), None) if link_edges is not None else None
+        if edge and edge[0] == "symlink":
+            continue
+        if edge:
+            kind = "link"
+            module = edge[1] if edge[1] in modules else "other"
+            target = edge[2]
+        elif output.endswith((".o", ".obj")):
+            kind = "compile"
+            target = target_dir[:-4] if target_dir else parts[-1]
+            units.append({"unit": output, "module": module, "target": target, "seconds": seconds})
+        elif link_edges is None and (output.endswith((".so", ".dll", ".dylib", ".a", ".lib", ".exe")) or ".so." in parts[-1] or any(part in ["bin", "lib", "libexec", "plugins", "qml"] for part in parts[1:-1])):
+            kind = "link"
+            target = re.sub(r"^(lib)?(Qt6)?", "", re.split(r"\.(so|dll|dylib|a|lib|exe)\b", parts[-1])[0]) or parts[-1]
+        else:
+            kind = "other"
+            target = target_dir[:-4] if target_dir else "custom commands"
+        report["steps"] += 1
+        report["cpu_seconds"] += seconds
+        for entry in [report["modules"].setdefault(module, {"compile": 0, "link": 0, "other": 0, "steps": 0}), report["targets"].setdefault("%s/%s" % (module, target), {"compile": 0, "link": 0, "other": 0, "steps": 0})]:
+            entry[kind] += seconds
+            entry["steps"] += 1
+    report["translation_units"] = sorted(units, key=lambda unit: unit["seconds"], reverse=True)[:top]
+    return report
+
+def distcchosts(hosts, timeout=1.0):
+    # Checks the reachability of distcc host specifications ([user]@host[/limit] over ssh, host[:port][/limit][,options])
+    # and returns the reachable ones with their number of job slots (distcc's default limit is 4). localhost compiles
+    # locally without a daemon. Options like --randomize and +zeroconf are kept without slots.
+    reachable = []
+    for spec in hosts:
+        if spec.startswith(("-", "+")):
+            reachable.append((spec, 0))
+            continue
+        address, _, limit = spec.split(",")[0].partition("/")
+        slots = int(limit) if limit.isdigit() else 4
+        if address == "localhost":
+            reachable.append((spec, slots))
+            continue
+        host, _, port = address.rpartition("@")[2].partition(":")
+        try:
+            socket.create_connection((host, int(port) if port.isdigit() else 22 if "@" in address else 3632), timeout=timeout).close()
+            reachable.append((spec, slots))
+        except (OSError, ValueError):
+            pass
+    return reachable
+
+def analyzedistcclog(log_file):
+    # Counts the compile jobs per host from the job summaries of a distcc client log (DISTCC_LOG) and the jobs that
+    # failed to distribute and were compiled locally instead
+    report = {"jobs": 0, "remote": 0, "local": 0, "fallback": 0, "hosts": {}}
+    with open(log_file, 'r', errors="replace") as f:
+        for line in f:
+            match = re.search(r"\(dcc_job_summary\) client: ([\w.:@\[\]-]+) COMPILE_\w+", line)
+            if match:
+                host = match.group(1)
+                report["jobs"] += 1
+                report["local" if host.startswith("localhost") else "remote"] += 1
+                report["hosts"][host] = report["hosts"].get(host, 0) + 1
+            elif "failed to distribute" in line:
+                report["fallback"] += 1
+    return report
+
+def parsebenchmarkxml(content):
+    # Parses the QtTest XML output (-o <file>,xml) and returns the result per iteration of every benchmark (QtTest
+    # already writes the value per iteration, "iterations" is only the number of iterations it was averaged over).
+    # Walltime results are normalized to nanoseconds.
+    results = {}
+    root = ET.fromstring(content)
+    for function in root.iter("TestFunction"):
+        for result in function.iter("BenchmarkResult"):
+            name = "%s::%s" % (root.get("name"), function.get("name"))
+            if result.get("tag"):
+                name += "(%s)" % result.get("tag")
+            value = float(result.get("value"))
+            metric = result.get("metric")
+            if metric == "WalltimeMilliseconds":
+                metric, value = "WalltimeNanoseconds", value * 1000000
+            results[name] = {"metric": metric, "value": value}
+    return results
+
+def readqttargets(package_folder):
+    # Reads the imported library targets Qt6::<name> of the installed CMake packages (lib/cmake/Qt6*/Qt6*Targets*.cmake).
+    # Returns {name: {"type", "location", "includedirs", "defines", "requires", "system_libs"}} with the paths relative to
+    # the package folder, the Qt6:: targets the target links to (requires) and the plain libraries it links (system_libs).
+    def split(value):
+        # splits a CMake list at the semicolons outside of generator expressions
+        items, depth, item = [], 0, ""
+        for i, c in enumerate(value):
+            depth += value.startswith("$<", i) - (c == ">" and depth > 0)
+            if c == ";" and not depth:
+                items.append(item)
+                item = ""
+            else:
+                item += c
+        return [item for item in items + [item] if item]
+    contents = []
+    for file in sorted(glob.glob(os.path.join(package_folder, "lib", "cmake", "Qt6*", "Qt6*Targets*.cmake"))):
+        with open(file, 'r') as f:
+            contents.append(f.read())
+    targets = {}
+    for content in contents:
+        for name, kind in re.findall(r"^add_library\(Qt6::(\w+) (\w+) IMPORTED\)", content, re.M):
+            targets[name] = {"type": kind, "location": None, "includedirs": [], "defines": [], "requires": [], "system_libs": []}
+    for content in contents:
+        for name, properties in re.findall(r"^set_target_properties\(Qt6::(\w+) PROPERTIES\n(.*?)^\s*\)", content, re.M | re.S):
+            if name not in targets:
+                continue
+            target = targets[name]
+            for key, value in re.findall(r'^\s*(\w+) "((?:[^"\\]|\\.)*)"', properties, re.M):
+                values = [re.sub(r"^\$<LINK_ONLY:(.*)>$", r"\1", item) for item in split(value.replace("\\$", "$"))]
+                values = [item for item in values if "$<" not in item]
+                if key == "INTERFACE_INCLUDE_DIRECTORIES":
+                    target["includedirs"] = [item[len("${_IMPORT_PREFIX}/"):] for item in values if item.startswith("${_IMPORT_PREFIX}/")]
+                elif key == "INTERFACE_COMPILE_DEFINITIONS":
+                    target["defines"] = values
+                elif key == "INTERFACE_LINK_LIBRARIES":
+                    target["requires"] = [item[len("Qt6::"):] for item in values if item.startswith("Qt6::")]
+                    target["system_libs"] = [item[2:] if item.startswith("-l") else item for item in values if re.match(r"^(-l)?[\w+.-]+$", item)]
+                elif re.match(r"^IMPORTED_(IMPLIB|LOCATION)_\w+$", key) and value.startswith("${_IMPORT_PREFIX}/"):
+                    if key.startswith("IMPORTED_IMPLIB") or not target["location"]:
+                        target["location"] = value[len("${_IMPORT_PREFIX}/"):]
+    return targets
+
+def mkspecfiles(package_folder, mkspec):
+    # Returns the files (relative to the package folder) of the mkspec folder and the files they include (#include "..."
+    # of qplatformdefs.h, include(...) of qmake.conf) transitively, e.g. mkspecs/devices/common/* and mkspecs/linux-g++/*
+    # for the device mkspecs
+    files = set()
+    pending = [os.path.join(mkspec, name) for name in os.listdir(os.path.join(package_folder, mkspec))] if os.path.isdir(os.path.join(package_folder, mkspec)) else []
+    while pending:
+        relative = os.path.normpath(pending.pop()).replace("\\", "/")
+        path = os.path.join(package_folder, relative)
+        if relative in files or relative.startswith("../") or not os.path.isfile(path):
+            continue
+        files.add(relative)
+        with open(path, 'r', errors="replace") as f:
+            content = f.read()
+        for include in re.findall(r'^\s*#\s*include\s+"([^"]+)"', content, re.M) + re.findall(r"^\s*include\(([^)]+)\)", content, re.M):
+            include = include.strip().replace("$$PWD/", "")
+            if not os.path.isabs(include) and "$" not in include:
+                pending.append(os.path.join(os.path.dirname(relative), include))
+    return files
+
+def libraryname(filename):
+    # Returns the name to link a library file with (libQt6Core.so.6.10.0 -> Qt6Core, Qt6Cored.lib -> Qt6Cored)
+    return re.match(r"^(?:lib)?(.+?)(?:\.\d+)*\.(?:so|a|lib|dylib|dll|dll\.a)(?:\.\d+)*$", filename).group(1)
+
+def elfsections(path):
+    # Returns the byte order and the section headers (type, flags, offset, size) of an ELF file or None for other files
+    with open(path, 'rb') as f:
+        header = f.read(64)
+        if len(header) < 52 or header[:4] != b"\x7fELF" or header[4] not in (1, 2) or header[5] not in (1, 2):
+            return None
+        is64, order = header[4] == 2, "<" if header[5] == 1 else ">"
+        if is64:
+            shoff, = struct.unpack_from(order + "Q", header, 0x28)
+            shentsize, shnum = struct.unpack_from(order + "HH", header, 0x3A)
+        else:
+            shoff, = struct.unpack_from(order + "I", header, 0x20)
+            shentsize, shnum = struct.unpack_from(order + "HH", header, 0x2E)
+        if not shoff or not shentsize:
+            return order, [] # no section header table
+        f.seek(shoff)
+        table = f.read(shentsize * shnum)
+    sections = []
+    for i in range(len(table) // shentsize):
+        if is64:
+            _, kind, flags, _, offset, size = struct.unpack_from(order + "IIQQQQ", table, i * shentsize)
+        else:
+            _, kind, flags, _, offset, size = struct.unpack_from(order + "IIIIII", table, i * shentsize)
+        sections.append((kind, flags, offset, size))
+    return order, sections
+
+def elfsizes(path):
+    # Returns the text, data and bss sizes (like the Berkeley output of size) of an ELF file or None for other files.
+    # text: read-only allocated sections, data: writable initialized sections, bss: writable uninitialized sections.
+    elf = elfsections(path)
+    if not elf:
+        return None
+    sizes = {"text": 0, "data": 0, "bss": 0}
+    for kind, flags, _, size in elf[1]:
+        if not flags & 0x2: # SHF_ALLOC
+            continue
+        if not flags & 0x1: # SHF_WRITE
+            sizes["text"] += size
+        elif kind == 8: # SHT_NOBITS
+            sizes["bss"] += size
+        else:
+            sizes["data"] += size
+    sizes["file"] = os.path.getsize(path)
+    return sizes
+
+def elfbuildid(path):
+    # Returns the GNU build-id (hex) of an ELF file or None
+    elf = elfsections(path)
+    if not elf:
+        return None
+    order, sections = elf
+    with open(path, 'rb') as f:
+        for kind, _, offset, size in sections:
+            if kind != 7: # SHT_NOTE
+                continue
+            f.seek(offset)
+            notes = f.read(size)
+            position = 0
+            while position + 12 <= len(notes):
+                namesz, descsz, note_type = struct.unpack_from(order + "III", notes, position)
+                name_start = position + 12
+                desc_start = name_start + (namesz + 3) // 4 * 4
+                if note_type == 3 and notes[name_start:name_start + namesz] == b"GNU\0": # NT_GNU_BUILD_ID
+                    return notes[desc_start:desc_start + descsz].hex()
+                position = desc_start + (descsz + 3) // 4 * 4
+    return None
+
+# The benchmarks of Qt used as training workload for PGO (relative to the submodule)
+PGO_TRAINING_BENCHMARKS = {
+    "qtbase": ["tests/benchmarks/corelib/tools", "tests/benchmarks/corelib/text"],
+    "qtdeclarative": ["tests/benchmarks/qml", "tests/benchmarks/quick"],
+}
+
+# Instruction set baselines of the cpuBaseline option: the architecture they apply to, the compiler flags (gcc/clang and
+# msvc, None if msvc can't target it) and the Qt SIMD features that are guaranteed by the baseline
+CPU_BASELINES = {
+    "x86-64-v2": {"arch": "x86_64", "flags": "-march=x86-64-v2", "msvc": None,
+                  "features": ["sse2", "sse3", "ssse3", "sse4_1", "sse4_2"]},
+    "x86-64-v3": {"arch": "x86_64", "flags": "-march=x86-64-v3", "msvc": "/arch:AVX2",
+                  "features": ["sse2", "sse3", "ssse3", "sse4_1", "sse4_2", "avx", "f16c", "avx2"]},
+    "x86-64-v4": {"arch": "x86_64", "flags": "-march=x86-64-v4", "msvc": "/arch:AVX512",
+                  "features": ["sse2", "sse3", "ssse3", "sse4_1", "sse4_2", "avx", "f16c", "avx2", "avx512f", "avx512cd", "avx512bw", "avx512dq", "avx512vl"]},
+    "armv8.2-a": {"arch": "armv8", "flags": "-march=armv8.2-a", "msvc": None,
+                  "features": ["neon", "arm_crc32"]},
+}
+
+# The default platform plugin per os (if QT_QPA_DEFAULT_PLATFORM isn't set) and the multimedia plugin per mmPlugin
+DEFAULT_PLATFORMS = {"Linux": "xcb", "Windows": "windows", "Macos": "cocoa", "iOS": "ios", "Android": "android"}
+MULTIMEDIA_PLUGINS = {"ffmpeg": "ffmpegmediaplugin", "gstreamer": "gstreamermediaplugin", "avfoundation": "darwinmediaplugin", "mediacodec": "androidmediaplugin", "wmf": "windowsmediaplugin"}
+
+# The submodules built as reusable stage by a staged build (user.qt:staged_build), if they are enabled
+STAGE_MODULES = ["qtbase", "qtshadertools", "qtdeclarative"]
+# The options, CMake variables and requirements that only affect a single submodule. They are left out of the stage key
+# if the submodule isn't part of the stage.
+MODULE_INPUTS = {
+    "qtmultimedia": {"options": ["mmPlugin", "ffmpegProfile", "ffmpegHwDecode"], "requires": ["ffmpeg"],
+                     "variables": ["FEATURE_ffmpeg", "FEATURE_wmf", "FEATURE_gstreamer", "FEATURE_pipewire", "FEATURE_pipewire_screencapture", "FEATURE_avfoundation", "FEATURE_vaapi", "FFMPEG_DIR", "QT_DEFAULT_MEDIA_BACKEND"]},
+    "qtquick3d": {"options": ["quick3dAssimp"], "variables": ["FEATURE_quick3d_assimp", "FEATURE_system_assimp"]},
+    "qttools": {"variables": ["QT_FEATURE_linguist"]},
+    "qtdoc": {"variables": ["TEST_libclang", "QT_FEATURE_clang_rtti", "FEATURE_clang", "FEATURE_clangcpp", "FEATURE_qdoc", "LLVM_INSTALL_DIR"]},
+}
+
+# The submodules providing the host tools that are needed to cross build a submodule (used for config=host:...)
+HOST_TOOL_MODULES = {
+    "qtbase": ["qtbase"], # moc, rcc, uic, qlalr, tracegen, androiddeployqt, qdbusxml2cpp
+    "qtdeclarative": ["qtdeclarative"], # qmlcachegen, qmltyperegistrar, qmlimportscanner
+    "qtshadertools": ["qtshadertools"], # qsb
+    "qtquick3d": ["qtquick3d", "qtshadertools"], # balsam, shadergen, instancer, qsb
+    "qtquick3dphysics": ["qtquick3d", "qtshadertools"], # cooker, qsb
+    "qtmultimedia": ["qtshadertools"], # qsb
+    "qtgraphs": ["qtshadertools"], # qsb
+    "qtremoteobjects": ["qtremoteobjects"], # repc
+    "qtscxml": ["qtscxml"], # qscxmlc
+    "qtwayland": ["qtwayland"], # qtwaylandscanner
+    "qtgrpc": ["qtgrpc"], # qtprotobufgen, qtgrpcgen
+    "qttools": ["qttools"], # lupdate, lrelease, lconvert
+    "qttranslations": ["qttools"], # lrelease
+    "qtdoc": ["qttools", "qtdoc"], # qdoc
+}
+# Host submodules whose tools link against QtGui
+HOST_GUI_MODULES = ["qtshadertools", "qtquick3d", "qtdoc"]
 
 class QtConan(ConanFile):
     jsonInfo = json.load(open("info.json", 'r'))
@@ -59,7 +683,7 @@ class QtConan(ConanFile):
     requires = []
     tool_requires = ["cmake/[>=3.22.6 <3.31.0]", "ninja/[>=1.11.1]", "7zip/[*]@%s/stable" % user]
     # ---Sources---
-    exports = ["info.json", "profiles/*"]
+    exports = ["info.json", "profiles/*", "qtmodules/*", "comparebenchmarks.py"]
     exports_sources = ["CMakeLists.txt", "AwesomeQtMetadataParser", "patches/*"]
     # ---Binary model---
     settings = "os", "compiler", "build_type", "arch"
@@ -71,6 +695,8 @@ class QtConan(ConanFile):
         "opengl": ["no", "es2", "es3", "es31", "es32", "desktop", "dynamic"],
         "openssl": [True, False],
         "openssl_hash": [True, False],
+        "zstd": [True, False],
+        "brotli": [True, False],
         "GUI": [True, False],
         "widgets": [True, False],
         "dbus": [True, False],
@@ -79,8 +705,24 @@ class QtConan(ConanFile):
         "widgetsstyle": [None, "android", "fusion", "mac", "stylesheet", "windows", "windows11", "windowsvista"],
         "quick2style": [None, "basic", "fusion", "imagine", "ios", "macos", "material", "universal", "windows"],
         "mmPlugin": [None, "ffmpeg", "gstreamer", "avfoundation", "mediacodec", "wmf"],
+        "ffmpegProfile": ["minimal", "performance"],
+        "ffmpegHwDecode": [True, False],
         "qmlWorkerScript": [True, False],
+        "qmlJit": [True, False],
+        "qmlCompiler": ["aot", "bytecode"],
         "quick3dAssimp": [True, False],
+        "linker": [None, "bfd", "gold", "lld", "mold"],
+        "splitDwarf": [True, False],
+        "compressDebugInfo": [True, False],
+        "pgo": [True, False],
+        "benchmarks": [True, False],
+        "unityBuild": [True, False],
+        "unityBatchSize": ["ANY"],
+        "pch": [True, False],
+        "footprint": [True, False],
+        "separateDebugInfo": [True, False],
+        "prune": [True, False],
+        "cpuBaseline": [None] + list(CPU_BASELINES),
         "config": ["ANY"],
         }, **{module: [True,False] for module in submodules})
     
@@ -91,6 +733,8 @@ class QtConan(ConanFile):
         "opengl": "no",
         "openssl": False, 
         "openssl_hash": False,
+        "zstd": False,
+        "brotli": False,
         "GUI": False, 
         "widgets": False,
         "dbus": False,
@@ -99,8 +743,24 @@ class QtConan(ConanFile):
         "widgetsstyle": None,
         "quick2style": None,
         "mmPlugin": None,
+        "ffmpegProfile": "minimal",
+        "ffmpegHwDecode": False,
         "qmlWorkerScript": True,
+        "qmlJit": True,
+        "qmlCompiler": "aot",
         "quick3dAssimp": False,
+        "linker": None,
+        "splitDwarf": False,
+        "compressDebugInfo": False,
+        "pgo": False,
+        "benchmarks": False,
+        "unityBuild": False,
+        "unityBatchSize": "32",
+        "pch": True,
+        "footprint": False,
+        "separateDebugInfo": False,
+        "prune": False,
+        "cpuBaseline": None,
         "config": "none"}, **{module: False for module in submodules})
     host_options = {**default_options, **{
         "shared": True, 
@@ -109,6 +769,7 @@ class QtConan(ConanFile):
         "opengl": "desktop",
         "openssl": False,
         "openssl_hash": False,
+        "zstd": True, # rcc --compress-algo zstd
         "GUI": True, 
         "widgets": True,
         "dbus": True,
@@ -138,14 +799,26 @@ class QtConan(ConanFile):
     def build_requirements(self):
         if cross_building(self):
             # Qt depends on itself if we are cross building. We have to provide the CMake cached variable QT_HOST_PATH
+            config = "host"
+            if self.conf.get("user.qt:minimal_host", default=False, check_type=bool):
+                config = self._minimal_host_config
             self.tool_requires("%s/%s@%s/%s" % (self.name, self.version, self.user, self.channel), 
-            options={"config": "host"}, visible=True)
+            options={"config": config}, visible=True)
+        if self._compiler_cache == "ccache":
+            self.tool_requires("ccache/[>=4.7]")
+        elif self._compiler_cache == "sccache":
+            self.tool_requires("sccache/[>=0.7]")
 
     def requirements(self):
         if self.get_option("openssl"):
             self.requires("openssl/[~3.0]@%s/stable" % self.user)
-        if self.get_option("qtmultimedia") and self.get_option("mmPlugin") == "ffmpeg":
+        if "qtmultimedia" in self._build_modules and self.get_option("mmPlugin") == "ffmpeg":
             self.requires("ffmpeg/[~7]")
+        # Qt has no bundled zstd and brotli sources. The static libraries are linked into Qt like the bundled 3rdparty libs.
+        if self.get_option("zstd"):
+            self.requires("zstd/[~1.5]", options={"shared": False})
+        if self.get_option("brotli"):
+            self.requires("brotli/[~1.1]", options={"shared": False})
 
     def config_options(self):
 
@@ -154,12 +827,110 @@ class QtConan(ConanFile):
 
     @property
     def is_host_build(self):
-        return self.options.get_safe("config") == "host"
+        return str(self.options.get_safe("config")).startswith("host")
+
+    @property
+    def _minimal_host_config(self):
+        # config=host:<flags and submodules> builds only the host tools the enabled target submodules need
+        tokens = set()
+        for module in self._build_modules:
+            tokens.update(HOST_TOOL_MODULES.get(module, []))
+        if self.get_option("widgets"):
+            tokens.update(["gui", "widgets"]) # uic
+        if self.get_option("dbus"):
+            tokens.add("dbus") # qdbusxml2cpp, qdbuscpp2xml
+        return "host:" + "+".join(sorted(tokens))
+
+    @property
+    def _host_options(self):
+        config = str(self.options.get_safe("config"))
+        if config == "host":
+            return QtConan.host_options
+        tokens = config.split(":", 1)[1].split("+") if ":" in config else []
+        unknown = [token for token in tokens if token not in QtConan.submodules and token not in ["gui", "widgets", "dbus"]]
+        if unknown or "qtbase" not in tokens:
+            raise ConanException("Invalid config=%s: expected host:<submodules, gui, widgets, dbus separated by +> including qtbase" % config)
+        gui = "gui" in tokens or any(module in tokens for module in HOST_GUI_MODULES)
+        return {**QtConan.default_options, **{
+            "zstd": True, # rcc --compress-algo zstd
+            "GUI": gui,
+            "widgets": "widgets" in tokens,
+            "dbus": "dbus" in tokens,
+            "opengl": "desktop" if "qtquick3d" in tokens else "no",
+            "quick3dAssimp": "qtquick3d" in tokens,
+            "config": config,
+        }, **{module: module in tokens for module in QtConan.submodules}}
+
+    @property
+    def _cache_folder(self):
+        # Root folder of the caches this recipe keeps outside of the Conan cache (shared by all builds on a machine)
+        return self.conf.get("user.qt:cache_folder", default=os.path.join(os.path.expanduser("~"), ".cache", "conan-qt"))
+
+    @property
+    def _compiler_cache(self):
+        # The compiler cache is a conf (and not an option) because it must not affect the package id
+        launcher = self.conf.get("user.qt:compiler_cache", default=None)
+        if launcher and launcher not in ["ccache", "sccache"]:
+            raise ConanException("user.qt:compiler_cache must be one of ccache, sccache - not %s" % launcher)
+        return launcher
+
+    @property
+    def _job_pools(self):
+        # Compile jobs use all cores. Link jobs are bounded by the physical memory divided by the expected memory of a
+        # single link step (LTO links of QtGui, QtQuick, QtQuick3D can take several GiB each).
+        compile_jobs = self.conf.get("user.qt:compile_jobs", default=build_jobs(self), check_type=int)
+        link_jobs = self.conf.get("user.qt:link_jobs", default=None, check_type=int)
+        if not link_jobs:
+            link_memory = self.conf.get("user.qt:link_memory", default=8192 if self.get_option("lto") else 2048, check_type=int) # MiB
+            memory = physicalmemory()
+            link_jobs = max(1, min(compile_jobs, int(memory * 0.8) // (link_memory * 1048576))) if memory else compile_jobs
+        return max(1, compile_jobs), max(1, link_jobs)
+
+    def _setup_distributed(self, tc):
+        # Distributed compilation (user.qt:distributed) with distcc or icecc as compiler launcher (ccache: as its prefix).
+        # Unreachable hosts are dropped. If no host is left the build compiles locally. Returns the setup or None.
+        tool = self.conf.get("user.qt:distributed", default=None)
+        if not tool:
+            return None
+        if tool not in ["distcc", "icecc"]:
+            raise ConanException("user.qt:distributed must be one of distcc, icecc - not %s" % tool)
+        if not shutil.which(tool):
+            self.output.warning("%s is not installed - compiling locally" % tool)
+            return None
+        if self._compiler_cache == "sccache":
+            self.output.warning("%s can't be combined with sccache - compiling locally" % tool)
+            return None
+        env = Environment()
+        if tool == "distcc":
+            hosts = self.conf.get("user.qt:distributed_hosts", default=[], check_type=list)
+            reachable = distcchosts(hosts)
+            remote_slots = sum(slots for spec, slots in reachable if not spec.startswith("localhost"))
+            env.define("DISTCC_HOSTS", " ".join(spec for spec, _ in reachable))
+            env.define("DISTCC_FALLBACK", "1") # compile locally if a host fails during the build
+            env.define_path("DISTCC_LOG", os.path.join(self.build_folder, "distcc.log"))
+            env.define("DISTCC_VERBOSE", "1") # the job summaries are only logged in verbose mode
+        else:
+            # The local iceccd daemon knows the scheduler and the workers, their number of slots isn't known in advance
+            hosts = ["127.0.0.1:10245"]
+            reachable = distcchosts(hosts)
+            remote_slots = 0
+        if not reachable or (tool == "distcc" and not remote_slots):
+            self.output.warning("None of the %s hosts %s is reachable - compiling locally" % (tool, hosts))
+            return None
+        if self._compiler_cache == "ccache":
+            env.define("CCACHE_PREFIX", tool)
+        else:
+            for lang in ["C", "CXX", "OBJC", "OBJCXX"]:
+                tc.variables["CMAKE_%s_COMPILER_LAUNCHER" % lang] = tool
+        env.vars(self, scope="build").save_script("conanqtdistributed")
+        setup = {"tool": tool, "hosts": hosts, "reachable": [spec for spec, _ in reachable], "remote_slots": remote_slots, "local_jobs": build_jobs(self)}
+        self.output.info("Distributed compilation with %s on %s (%u remote slots)" % (tool, ", ".join(setup["reachable"]), remote_slots))
+        return setup
 
     def get_option(self, key: str):
         if self.is_host_build:
-            if key in self.host_options:
-                return self.host_options[key]
+            if key in self._host_options:
+                return self._host_options[key]
             else:
                 return False
         else:
@@ -179,21 +950,50 @@ class QtConan(ConanFile):
         else:
             self.options.rm_safe("config")
 
+        if not self.is_host_build:
+            self._resolve_modules()
+
         if self.settings.os != "Linux":
             self.options.rm_safe("fontconfig")
 
-        if not self.get_option("qtdeclarative"):
+        if "qtdeclarative" not in self._build_modules:
             self.options.rm_safe("qmlWorkerScript")
+            self.options.rm_safe("qmlJit")
+            self.options.rm_safe("qmlCompiler")
+
+        if self.settings.os == "iOS":
+            self.options.rm_safe("qmlJit") # executable memory isn't allowed on iOS
+
+        if "qtmultimedia" not in self._build_modules or self.get_option("mmPlugin") != "ffmpeg":
+            self.options.rm_safe("ffmpegProfile")
+            self.options.rm_safe("ffmpegHwDecode")
+        elif self.settings.os != "Linux":
+            self.options.rm_safe("ffmpegHwDecode")
+
+        if not self.get_option("unityBuild"):
+            self.options.rm_safe("unityBatchSize")
 
-        if not self.get_option("qtquick3d"):
+        if "qtquick3d" not in self._build_modules:
             self.options.rm_safe("quick3dAssimp")
 
+        if self.settings.os not in ["Linux", "Android"]:
+            # Only the ELF toolchains support choosing the linker and splitting/compressing the DWARF debug info
+            self.options.rm_safe("linker")
+            self.options.rm_safe("splitDwarf")
+            self.options.rm_safe("compressDebugInfo")
+            self.options.rm_safe("separateDebugInfo")
+
+        if self.settings.os != "Linux":
+            self.options.rm_safe("pgo")
+
         if self.get_option("openssl"):
             self.options["openssl"].shared = self.get_option("shared")
-        if self.get_option("qtmultimedia") and self.get_option("mmPlugin") == "ffmpeg":
+        if "qtmultimedia" in self._build_modules and self.get_option("mmPlugin") == "ffmpeg":
             self.options["ffmpeg"].shared = self.get_option("shared")
             self.options["ffmpeg"].swresample = True
-            self.options["ffmpeg"].with_asm = False
+            # The hand written assembly of the decoders (needs nasm on x86, a tool requirement of the ffmpeg recipe) is
+            # left out on Android x86, where it leads to text relocations
+            self.options["ffmpeg"].with_asm = self.get_option("ffmpegProfile") == "performance" and not (self.settings.os == "Android" and str(self.settings.arch) in ["x86", "x86_64"])
             self.options["ffmpeg"].with_sdl = False
             self.options["ffmpeg"].with_ssl = False
             self.options["ffmpeg"].with_xcb = False
@@ -202,8 +1002,8 @@ class QtConan(ConanFile):
             self.options["ffmpeg"].with_zlib = False
             self.options["ffmpeg"].with_bzip2 = False
             self.options["ffmpeg"].with_pulse = False
-            self.options["ffmpeg"].with_vaapi = False
-            self.options["ffmpeg"].with_vdpau = False
+            self.options["ffmpeg"].with_vaapi = bool(self.get_option("ffmpegHwDecode"))
+            self.options["ffmpeg"].with_vdpau = bool(self.get_option("ffmpegHwDecode"))
             self.options["ffmpeg"].with_libvpx = False
             self.options["ffmpeg"].with_vorbis = False
             self.options["ffmpeg"].with_vulkan = False
@@ -220,6 +1020,49 @@ class QtConan(ConanFile):
             self.options["ffmpeg"].with_libfdk_aac = False
             self.options["ffmpeg"].with_libmp3lame = False
 
+    def package_id(self):
+        # Precompiled headers only speed up the build
+        self.info.options.rm_safe("pch")
+        # A staged build (see _staged, _stage_modules) packages the whole stage, which contains qtshadertools with
+        # qtdeclarative and GUI even if no enabled module requires it. The options can only be read from self.info here.
+        options = self.info.options
+        if self.conf.get("user.qt:staged_build", default=False, check_type=bool) and not str(options.get_safe("config")).startswith("host") \
+                and not options.get_safe("pgo") and not options.get_safe("benchmarks") and options.get_safe("GUI"):
+            modules, _ = resolvesubmodules(QtConan.submodules, [module for module in QtConan.submodules if options.get_safe(module)])
+            if "qtdeclarative" in modules and "qtshadertools" not in modules:
+                self.info.conf.define("user.qt:staged_build", True)
+
+    def validate(self):
+        if self.get_option("unityBuild") and not str(self.get_option("unityBatchSize")).isdigit():
+            raise ConanInvalidConfiguration("unityBatchSize has to be a number of source files (0 puts all sources of a target into a single unity source)")
+        if self.get_option("pgo") and cross_building(self):
+            raise ConanInvalidConfiguration("pgo needs to run the training workload on the build machine and can't be used for cross builds")
+        if self.get_option("benchmarks") and cross_building(self):
+            raise ConanInvalidConfiguration("benchmarks need to run on the build machine and can't be used for cross builds")
+        if self.get_option("pgo") and str(self.settings.compiler) not in ["gcc", "clang"]:
+            raise ConanInvalidConfiguration("pgo is only supported with gcc and clang")
+        if self.get_option("cpuBaseline"):
+            baseline = CPU_BASELINES[str(self.get_option("cpuBaseline"))]
+            if str(self.settings.arch) != baseline["arch"]:
+                raise ConanInvalidConfiguration("cpuBaseline %s requires arch %s" % (self.get_option("cpuBaseline"), baseline["arch"]))
+            if self.settings.compiler == "msvc" and not baseline["msvc"]:
+                raise ConanInvalidConfiguration("cpuBaseline %s is not supported by msvc" % self.get_option("cpuBaseline"))
+
+    def _resolve_modules(self):
+        # The options are frozen in configure(), the dependencies of the enabled modules are built anyway (see
+        # _build_modules) and only reported here
+        requested = [module for module in QtConan.submodules if self.options.get_safe(module)]
+        order, unknown = resolvesubmodules(QtConan.submodules, requested)
+        required_by = {}
+        for module in order:
+            for dependency in QtConan.submodules[module]["depends"]:
+                required_by.setdefault(dependency, []).append(module)
+        for module in order:
+            if module not in requested:
+                self.output.info("Building Qt submodule %s - it is required by %s" % (module, ", ".join(required_by[module])))
+        if unknown:
+            self.output.info("Ignoring dependencies on unavailable Qt submodules: %s" % unknown)
+
     def system_requirements(self):
         if self.settings.os == "Linux":
             apt = Apt(self)
@@ -228,54 +1071,158 @@ class QtConan(ConanFile):
                 pack_names.extend(["libwayland-dev", "libfontconfig1-dev", "libfreetype6-dev", "libx11-dev", "libx11-xcb-dev", "libxext-dev", "libxfixes-dev", "libxi-dev", "libxrender-dev", "libxcb1-dev", "libxcb-cursor-dev", "libxcb-glx0-dev", "libxcb-keysyms1-dev", "libxcb-image0-dev", "libxcb-shm0-dev", "libxcb-icccm4-dev", "libxcb-sync-dev", "libxcb-xfixes0-dev", "libxcb-shape0-dev", "libxcb-randr0-dev", "libxcb-render-util0-dev", "libxcb-util-dev", "libxcb-xinerama0-dev", "libxcb-xkb-dev", "libxkbcommon-dev", "libxkbcommon-x11-dev"])
                 if self.get_option("opengl") == "desktop":
                     pack_names.append("libgl1-mesa-dev")
-            if self.get_option("qtmultimedia"):
+            if "qtmultimedia" in self._build_modules:
                 pack_names.extend(["libasound2-dev", "libpulse-dev"])
 
             apt.install(pack_names, update=True)
 
+    @property
+    def _build_modules(self):
+        # The enabled modules and all their dependencies in build order
+        order, _ = resolvesubmodules(QtConan.submodules, [module for module in QtConan.submodules if self.get_option(module)])
+        return order
+
+    @property
+    def _split_dwarf(self):
+        return bool(self.get_option("splitDwarf")) and self.settings.build_type in ["Debug", "RelWithDebInfo"]
+
+    @property
+    def _staged(self):
+        # pgo and benchmarks need the tests of all modules in a single build folder
+        return self.conf.get("user.qt:staged_build", default=False, check_type=bool) and not self.is_host_build and not self.get_option("pgo") and not self.get_option("benchmarks")
+
+    @property
+    def _stage_modules(self):
+        # The enabled STAGE_MODULES and their dependencies in build order. qtdeclarative (GUI) is always staged together
+        # with qtshadertools (recommended by the .gitmodules, it enables the shader based parts of QtQuick), so adding a
+        # module that needs qtshadertools (qtquick3d, qtmultimedia, ...) doesn't change the stage.
+        requested = [module for module in STAGE_MODULES if module in self._build_modules]
+        if "qtdeclarative" in requested and self.get_option("GUI") and "qtshadertools" in QtConan.submodules:
+            requested.append("qtshadertools")
+        order, _ = resolvesubmodules(QtConan.submodules, requested)
+        return order
+
+    @property
+    def _source_modules(self):
+        # The submodules extracted by source(). source() can't read the options, so with user.qt:selective_source it
+        # only extracts the top level build files and build() extracts the modules of its configuration on demand.
+        if self.conf.get("user.qt:selective_source", default=False, check_type=bool):
+            return set()
+        return set(QtConan.submodules) - {"qtwebengine"}
+
+    @property
+    def _patches(self):
+        return self.conan_data["patches"][str(self.version)]
+
+    @property
+    def _source_cache_folder(self):
+        # The patched source tree is cached (user.qt:source_cache) under a hash of everything it is made of: the
+        # tarball, the extracted submodules and the patch steps including the content of the patch files
+        if not self.conf.get("user.qt:source_cache", default=False, check_type=bool):
+            return None
+        key = hashlib.sha256()
+        key.update(json.dumps([self.conan_data["sources"][str(self.version)], sorted(self._source_modules), self._patches], sort_keys=True).encode("utf-8"))
+        for entry in self._patches:
+            if "patch_file" in entry:
+                with open(os.path.join(self.export_sources_folder, entry["patch_file"]), 'rb') as f:
+                    key.update(f.read())
+        return os.path.join(self._cache_folder, "sources", "%s-%s" % (self.version, key.hexdigest()[:32]))
+
+    def _download(self, source):
+        # Downloads a conandata sources entry from the mirrors into the artifact store shared by all builds. Without a
+        # declared sha256 the artifact is verified against the sha256 published by the origin (never by a mirror).
+        mirrors = self.conf.get("user.qt:mirrors", default=[], check_type=list) + self.conan_data["mirrors"]
+        store = os.path.join(self._cache_folder, "artifacts")
+        sha256 = source.get("sha256")
+        if not sha256:
+            origin = self.conan_data["origin"].rstrip("/") + "/" + source["path"]
+            sha256 = fetchsha256(origin, store)
+            self.output.warning("No sha256 of %s is declared in conandata.yml - using the sha256 published at %s.sha256: %s" % (os.path.basename(source["path"]), origin, sha256))
+        path, report = fetchartifact([mirror.rstrip("/") + "/" + source["path"] for mirror in mirrors], sha256, store,
+                                     jobs=self.conf.get("user.qt:download_jobs", default=4, check_type=int))
+        for failure in report["failed"]:
+            self.output.warning("Download failed: %s" % failure)
+        if report["cached"]:
+            self.output.info("Using %s from the artifact store" % report["name"])
+        else:
+            self.output.info("Downloaded %s from %s in %.1fs (%.1f MiB, %.1f MiB resumed, %u chunks)" % (report["name"], report["url"], report["seconds"], report["bytes"] / 1048576, report["resumed_bytes"] / 1048576, report["chunks"]))
+        return path, report
+
+    def _has_source(self, module):
+        return os.path.isdir(os.path.join(self.source_folder, "Qt", module))
+
+    def _patch_module(self, module, folder):
+        # Applies the patch steps of a submodule (paths Qt/<module>/...) to its sources in folder
+        for entry in self._patches:
+            path = (entry.get("base_path") or entry.get("replace_in_file")).split("/", 2)
+            if path[1] != module:
+                continue
+            target = os.path.join(folder, *path[2:])
+            if "patch_file" in entry:
+                patch(self, base_path=target, patch_file=entry["patch_file"])
+            else:
+                replace_in_file(self, target, entry["search"], entry["replace"])
+
+    def _extract_modules(self, modules):
+        # Extracts the submodules source() didn't extract (user.qt:selective_source) into the source folder, which is
+        # shared by all configurations of the recipe revision. Each module is extracted and patched in a private folder
+        # and moved into place with a single rename, so a concurrent build never sees a partial or unpatched module.
+        tarball, _ = self._download(self.conan_data["sources"][str(self.version)])
+        qt_folder = os.path.join(self.source_folder, "Qt")
+        tmp_names = {module: ".%s.%u.tmp" % (module, os.getpid()) for module in modules}
+        try:
+            report = extractsources(tarball, qt_folder, only_dirs=tmp_names)
+            self.output.info("Extracted the Qt submodules %s: %u files (%.1f MiB) in %.1fs" % (", ".join(modules), report["files"], report["bytes_written"] / 1048576, report["seconds"]))
+            for module in modules:
+                tmp_folder = os.path.join(qt_folder, tmp_names[module])
+                if not os.path.isdir(tmp_folder):
+                    raise ConanException("The Qt submodule %s is not part of %s" % (module, os.path.basename(tarball)))
+                self._patch_module(module, tmp_folder)
+                try:
+                    os.rename(tmp_folder, os.path.join(qt_folder, module))
+                except OSError:
+                    pass # extracted concurrently by another build
+        finally:
+            for name in tmp_names.values():
+                shutil.rmtree(os.path.join(qt_folder, name), ignore_errors=True)
+
     def source(self):
         #git = Git(self)
         #git.run("clone git://code.qt.io/qt/qt5.git --branch=%s --depth 1 --single-branch --no-tags --recurse-submodules --shallow-submodules --progress --jobs %u Qt" % (self.version, build_jobs(self)))
-        major_version=self.version.split(".")[0]
-        minor_version=self.version.split(".")[1]
-        get(self, "https://download.qt.io/official_releases/qt/%s.%s/%s/single/qt-everywhere-src-%s.tar.xz" % (major_version, minor_version, self.version, self.version), destination="Qt", strip_root=True)
-        replace_in_file(self, "Qt/qtbase/src/corelib/io/qfilesystemengine_unix.cpp", "QT_BEGIN_NAMESPACE", "QT_BEGIN_NAMESPACE\n#undef STATX_BASIC_STATS")
-        replace_in_file(self, "Qt/qtdeclarative/src/plugins/CMakeLists.txt", "add_subdirectory(qmllint)", "if(QT_FEATURE_qml_debug AND QT_FEATURE_thread)\nadd_subdirectory(qmllint)\nendif()")
-        replace_in_file(self, "Qt/qtbase/cmake/QtAutoDetectHelpers.cmake", "if(NOT android_detected)", "if(\"OFF\")")
-        patch(self, base_path="Qt/qttools", patch_file=os.path.join("patches","linguist.patch"))
-        #patch(self, base_path="Qt/qtbase", patch_file=os.path.join("patches", "Qt6CoreMacros_%s.cmake.patch" % self.version))
-        replace_in_file(self, "Qt/qtbase/src/corelib/Qt6CoreMacros.cmake", "elseif(UNIX AND NOT APPLE AND NOT ANDROID AND NOT CMAKE_CROSSCOMPILING)", "elseif(UNIX AND NOT APPLE AND NOT ANDROID)")
-        replace_in_file(self, "Qt/qtdeclarative/src/qml/Qt6QmlMacros.cmake", "elseif(UNIX AND NOT APPLE AND NOT ANDROID AND NOT CMAKE_CROSSCOMPILING", "elseif(UNIX AND NOT APPLE AND NOT ANDROID")
-        #replace_in_file(self, "Qt/qtdeclarative/src/qml/Qt6QmlMacros.cmake", "string(APPEND content \"prefer :${prefix}\\n\")", "")
-        #patch(self, base_path="Qt/qtmultimedia", patch_file=os.path.join("patches", "ffmpeg_plugin_jni_onload_fix.patch"))
-        patch(self, base_path="Qt/qtbase", patch_file=os.path.join("patches", "ios_build.patch"))
-        patch(self, base_path="Qt/qtlocation", patch_file=os.path.join("patches", "disable_test_qtlocation.patch"))
-        patch(self, base_path="Qt/qtgraphs", patch_file=os.path.join("patches", "disable_test_qtgraphs.patch"))
-        patch(self, base_path="Qt/qtgraphs", patch_file=os.path.join("patches", "qtgraphs_without_widgets.patch"))
-        patch(self, base_path="Qt/qtdeclarative", patch_file=os.path.join("patches", "qml_plugin_init.patch"))
-        patch(self, base_path="Qt/qtdeclarative", patch_file=os.path.join("patches", "disable_qml_tools.patch"))
-        patch(self, base_path="Qt/qttools", patch_file=os.path.join("patches", "fix_dbusviewer_wo_xml.patch"))
-        #patch(self, base_path="Qt/qtbase", patch_file=os.path.join("patches", "android_hang.diff"))
-        rmdir(self, "Qt/qtwebengine")
-
-        # enable rasp-pi brcm opengl implementation (very unstable - don't use)
-        #replace_in_file(self, "Qt/qtbase/src/plugins/platforms/eglfs/deviceintegration/CMakeLists.txt", "# add_subdirectory(eglfs_brcm) # TODO: QTBUG-112769", "add_subdirectory(eglfs_brcm)")
+        cache_folder = self._source_cache_folder
+        if cache_folder and os.path.isdir(cache_folder):
+            start = time.monotonic()
+            linktree(cache_folder, self.source_folder)
+            self.output.info("Using the patched sources from %s (%.1fs)" % (cache_folder, time.monotonic() - start))
+            return
+        tarball, download_report = self._download(self.conan_data["sources"][str(self.version)])
+        report = extractsources(tarball, "Qt", set(QtConan.submodules) - self._source_modules)
+        report["download"] = download_report
+        self.output.info("Extracted %u files (%.1f MiB written, %.1f MiB of skipped modules never written) in %.1fs" % (report["files"], report["bytes_written"] / 1048576, report["bytes_skipped"] / 1048576, report["seconds"]))
+        with open("extract_report.json", 'w') as f:
+            json.dump(report, f, indent=2)
+        for module in self._source_modules:
+            if self._has_source(module):
+                self._patch_module(module, os.path.join(self.source_folder, "Qt", module))
+        if cache_folder:
+            tmp_folder = "%s.%u.tmp" % (cache_folder, os.getpid())
+            for folder in ["Qt", "extract_report.json"]:
+                linktree(folder, os.path.join(tmp_folder, folder))
+            try:
+                os.replace(tmp_folder, cache_folder)
+                self.output.info("Stored the patched sources in %s" % cache_folder)
+            except OSError:
+                shutil.rmtree(tmp_folder, ignore_errors=True) # stored concurrently by another build
+
+        # enable rasp-pi brcm opengl implementation (very unstable - don't use, see conandata.yml)
         #shutil.copyfile(os.path.join(self.source_folder, "patches", "eglfs_brcm", "CMakeLists.txt"), os.path.join(self.source_folder, "Qt", "qtbase", "src", "plugins", "platforms", "eglfs", "deviceintegration", "eglfs_brcm", "CMakeLists.txt"))
         
     def generate(self):
         tc = CMakeToolchain(self, generator="Ninja")
         ms = VirtualBuildEnv(self)
-        module_list = []
+        module_list = self._build_modules
         for module in QtConan.submodules:
-            tc.variables["BUILD_" + module] = False
-            if self.is_host_build:
-                if self.host_options[module]:
-                    tc.variables["BUILD_" + module] = True
-                    module_list.append(module)                
-            else:
-                if getattr(self.options, module):
-                    tc.variables["BUILD_" + module] = True
-                    module_list.append(module)
+            tc.variables["BUILD_" + module] = module in module_list
         self.output.info('Building Qt submodules: %s' % module_list)
         tc.variables["QT_BUILD_SUBMODULES"] = ";".join(module_list)
         #tc.variables["CMAKE_FIND_DEBUG_MODE"] = True
@@ -291,7 +1238,6 @@ class QtConan(ConanFile):
                 # targeting raspberry pi
                 tc.variables["QT_QMAKE_TARGET_MKSPEC"] = "devices/linux-rasp-pi-g++"
                 tc.variables["QT_QPA_DEFAULT_PLATFORM"] = "eglfs"
-                tc.variables["FEATURE_brotli"] = False
                 tc.variables["FEATURE_pcre2"] = True
                 #tc.variables["FEATURE_kms"] = True
                 tc.variables["FEATURE_system_libb2"] = False
@@ -301,7 +1247,6 @@ class QtConan(ConanFile):
                 tc.variables["FEATURE_mng"] = False
                 tc.variables["FEATURE_pkg_config"] = True
                 #tc.variables["FEATURE_libinput"] = True
-                tc.variables["FEATURE_UNITY_BUILD"] = False
                 tc.variables["FEATURE_use_gold_linker"] = False
                 tc.variables["FEATURE_use_gold_linker_alias"] = False
 
@@ -336,7 +1281,7 @@ class QtConan(ConanFile):
         tc.variables["FEATURE_mng"] = False
 
         # network
-        tc.variables["FEATURE_brotli"] = False
+        tc.variables["FEATURE_brotli"] = bool(self.get_option("brotli"))
         tc.variables["FEATURE_gssapi"] = False
 
         #tc.variables["BUILD_qt5compat"] = False # disable deprecated stuff
@@ -349,9 +1294,19 @@ class QtConan(ConanFile):
         tc.variables["FEATURE_backtrace"] = False
         tc.variables["FEATURE_glib"] = False
         tc.variables["FEATURE_slog2"] = False
-        tc.variables["FEATURE_zstd"] = False
+        tc.variables["FEATURE_zstd"] = bool(self.get_option("zstd"))
+        if self.get_option("zstd") or self.get_option("brotli"):
+            # Qt's FindWrapZSTD and FindWrapBrotli look for pkg-config files first and fall back to the <package>_ROOT
+            env = Environment()
+            env.prepend_path("PKG_CONFIG_PATH", self.generators_folder)
+            env.vars(self, scope="build").save_script("conanqtpkgconfig")
+            PkgConfigDeps(self).generate()
+            if self.get_option("zstd"):
+                tc.variables["WrapZSTD_ROOT"] = self.dependencies["zstd"].package_folder
+            if self.get_option("brotli"):
+                tc.variables["WrapBrotli_ROOT"] = self.dependencies["brotli"].package_folder
         tc.variables["FEATURE_libudev"] = False
-        if self.get_option("qtdoc"):
+        if "qtdoc" in self._build_modules:
             #tc.variables["TEST_libclang"] = True
             tc.variables["QT_FEATURE_clang_rtti"] = True
             tc.variables["FEATURE_clang"] = True
@@ -384,6 +1339,11 @@ class QtConan(ConanFile):
         tc.variables["QT_BUILD_BENCHMARKS"] = False
         tc.variables["QT_BUILD_MANUAL_TESTS"] = False
         tc.variables["QT_BUILD_TESTS"] = False
+        if self.get_option("pgo") or self.get_option("benchmarks"):
+            # The benchmarks are not built by default (QT_BUILD_TESTS_BY_DEFAULT) but on demand by build()
+            tc.variables["FEATURE_testlib"] = True
+            tc.variables["QT_BUILD_TESTS"] = True
+            tc.variables["QT_BUILD_BENCHMARKS"] = True
         tc.variables["QT_USE_VCPKG"] = False
         tc.variables["QT_BUILD_TESTS_BY_DEFAULT"] = False
         tc.variables["QT_BUILD_EXAMPLES"] = False
@@ -430,12 +1390,12 @@ class QtConan(ConanFile):
         else:
             tc.variables["FEATURE_xml"] = False
 
-        if self.get_option("qttools") and self.get_option("qttranslations"):
+        if "qttools" in self._build_modules and ("qttranslations" in self._build_modules or self.is_host_build):
             tc.variables["QT_FEATURE_linguist"] = True # feature switch for lupdate, lrelease, lconvert
         else:
             tc.variables["QT_FEATURE_linguist"] = False
 
-        if self.get_option("qtmultimedia"):
+        if "qtmultimedia" in self._build_modules:
             tc.variables["FEATURE_ffmpeg"] = False
             tc.variables["FEATURE_wmf"] = False
             tc.variables["FEATURE_gstreamer"] = False
@@ -446,6 +1406,8 @@ class QtConan(ConanFile):
                 tc.variables["FEATURE_ffmpeg"] = True
                 tc.variables["FFMPEG_DIR"] = self.dependencies["ffmpeg"].package_folder
                 tc.variables["QT_DEFAULT_MEDIA_BACKEND"] = "ffmpeg"
+                if self.settings.os == "Linux":
+                    tc.variables["FEATURE_vaapi"] = bool(self.get_option("ffmpegHwDecode"))
             elif self.get_option("mmPlugin") == "wmf":
                 tc.variables["FEATURE_wmf"] = True
                 tc.variables["QT_DEFAULT_MEDIA_BACKEND"] = "windows"
@@ -480,10 +1442,36 @@ class QtConan(ConanFile):
         else:
             tc.variables["FEATURE_widgets"] = False
 
-        if self.get_option("qtdeclarative"):
-            tc.variables["FEATURE_qml_debug"] = self.settings.build_type == "Debug"
-            tc.variables["FEATURE_qml_profiler"] = self.settings.build_type == "Debug"
+        if "qtdeclarative" in self._build_modules:
+            tc.variables["FEATURE_qml_debug"] = self.settings.build_type == "Debug" and not self.get_option("footprint")
+            tc.variables["FEATURE_qml_profiler"] = self.settings.build_type == "Debug" and not self.get_option("footprint")
             tc.variables["FEATURE_qml_worker_script"] = self.get_option("qmlWorkerScript")
+            if not self.get_option("qmlJit"):
+                # Qt enables the JIT only on the architectures that support it (e.g. not on armv6), so it is never forced on
+                tc.variables["FEATURE_qml_jit"] = False
+            if self.get_option("qmlCompiler") == "bytecode":
+                # qmlcachegen reads its arguments from a target property when the build system is generated. The deferred
+                # call runs after all directories are processed and adds --only-bytecode to every QML module.
+                project_include = os.path.join(self.generators_folder, "qml_compiler.cmake")
+                with open(project_include, 'w') as f:
+                    f.write("""if(NOT COMMAND conan_qt_qml_only_bytecode)
+    function(conan_qt_qml_only_bytecode directory)
+        get_property(targets DIRECTORY "${directory}" PROPERTY BUILDSYSTEM_TARGETS)
+        foreach(target IN LISTS targets)
+            get_target_property(uri ${target} QT_QML_MODULE_URI)
+            if(uri)
+                set_property(TARGET ${target} APPEND PROPERTY QT_QMLCACHEGEN_ARGUMENTS --only-bytecode)
+            endif()
+        endforeach()
+        get_property(subdirectories DIRECTORY "${directory}" PROPERTY SUBDIRECTORIES)
+        foreach(subdirectory IN LISTS subdirectories)
+            conan_qt_qml_only_bytecode("${subdirectory}")
+        endforeach()
+    endfunction()
+    cmake_language(DEFER DIRECTORY "${CMAKE_SOURCE_DIR}" CALL conan_qt_qml_only_bytecode "${CMAKE_SOURCE_DIR}")
+endif()
+""")
+                tc.variables["CMAKE_PROJECT_INCLUDE"] = project_include.replace("\\", "/")
             if self.get_option("quick2style"):
                 tc.variables["FEATURE_quickcontrols2_basic"] = True
                 tc.variables["FEATURE_quickcontrols2_fusion"] = False
@@ -495,7 +1483,7 @@ class QtConan(ConanFile):
                 tc.variables["FEATURE_quickcontrols2_windows"] = False
                 tc.variables["FEATURE_quickcontrols2_" + str(self.get_option("quick2style"))] = True
 
-        if self.get_option("qtquick3d"):
+        if "qtquick3d" in self._build_modules:
             tc.variables["FEATURE_quick3d_assimp"] = self.get_option("quick3dAssimp")
             tc.variables["FEATURE_system_assimp"] = False
 
@@ -504,6 +1492,53 @@ class QtConan(ConanFile):
         else:
             tc.variables["BUILD_SHARED_LIBS"] = False
 
+        if self.get_option("linker"):
+            for linker in ["bfd", "gold", "lld", "mold"]:
+                tc.variables["FEATURE_use_%s_linker" % linker] = linker == self.get_option("linker")
+            tc.variables["FEATURE_use_gold_linker_alias"] = False
+
+        if self.get_option("cpuBaseline"):
+            baseline = CPU_BASELINES[str(self.get_option("cpuBaseline"))]
+            flags = baseline["msvc"] if self.settings.compiler == "msvc" else baseline["flags"]
+            tc.extra_cflags.append(flags)
+            tc.extra_cxxflags.append(flags)
+            for feature in baseline["features"]:
+                tc.variables["FEATURE_" + feature] = True
+
+        if self._split_dwarf:
+            tc.extra_cflags.append("-gsplit-dwarf")
+            tc.extra_cxxflags.append("-gsplit-dwarf")
+
+        if self.get_option("compressDebugInfo"):
+            tc.extra_cflags.append("-gz")
+            tc.extra_cxxflags.append("-gz")
+            tc.extra_sharedlinkflags.append("-Wl,--compress-debug-sections=zlib")
+            tc.extra_exelinkflags.append("-Wl,--compress-debug-sections=zlib")
+
+        tc.variables["QT_UNITY_BUILD"] = bool(self.get_option("unityBuild"))
+        if self.get_option("unityBuild"):
+            tc.variables["QT_UNITY_BUILD_BATCH_SIZE"] = int(str(self.get_option("unityBatchSize")))
+        tc.variables["BUILD_WITH_PCH"] = bool(self.get_option("pch"))
+
+        if self.get_option("footprint"):
+            tc.variables["FEATURE_optimize_size"] = True
+            tc.variables["FEATURE_reduce_exports"] = True # hidden visibility of everything that isn't exported explicitly
+            if self.settings.os in ["Linux", "Android"]:
+                tc.variables["FEATURE_reduce_relocations"] = True # -Bsymbolic-functions
+            if self.settings.compiler == "msvc":
+                tc.extra_cflags.extend(["/Gy", "/Gw"])
+                tc.extra_cxxflags.extend(["/Gy", "/Gw"])
+                gc_sections = "/OPT:REF /OPT:ICF"
+            else:
+                tc.extra_cflags.extend(["-ffunction-sections", "-fdata-sections"])
+                tc.extra_cxxflags.extend(["-ffunction-sections", "-fdata-sections"])
+                gc_sections = "-Wl,-dead_strip" if self.settings.os in ["Macos", "iOS"] else "-Wl,--gc-sections"
+            tc.extra_sharedlinkflags.append(gc_sections)
+            tc.extra_exelinkflags.append(gc_sections)
+            # features that are only needed during development
+            for feature in ["jalalicalendar", "islamiccivilcalendar", "whatsthis", "qml_debug", "qml_profiler", "qml_preview", "quick_designer"]:
+                tc.variables["FEATURE_" + feature] = False
+
         if self.get_option("lto"):
             tc.variables["CMAKE_INTERPROCEDURAL_OPTIMIZATION"] = True
             tc.variables["FEATURE_ltcg"] = True # link time optimization
@@ -566,26 +1601,555 @@ class QtConan(ConanFile):
             tc.variables["FEATURE_openssl_linked"] = False
             tc.variables["FEATURE_openssl_runtime"] = False
 
+        distributed = self._setup_distributed(tc)
+        compile_jobs, link_jobs = self._job_pools
+        if distributed:
+            if self.conf.get("user.qt:compile_jobs", default=None, check_type=int) is None:
+                compile_jobs += distributed["remote_slots"] # preprocessing and linking stay local
+            # build() runs Ninja with -j<compile_jobs> (see _build_jobs), otherwise tools.build:jobs caps the compile pool
+            distributed.update({"compile_jobs": compile_jobs, "link_jobs": link_jobs})
+            with open(os.path.join(self.generators_folder, "distributed.json"), 'w') as f:
+                json.dump(distributed, f, indent=2)
+        tc.variables["CMAKE_JOB_POOLS"] = "compile=%u;link=%u" % (compile_jobs, link_jobs)
+        tc.variables["CMAKE_JOB_POOL_COMPILE"] = "compile"
+        tc.variables["CMAKE_JOB_POOL_LINK"] = "link"
+        self.output.info("Ninja job pools: %u compile jobs, %u link jobs" % (compile_jobs, link_jobs))
+
+        if self._compiler_cache:
+            launcher = self._compiler_cache
+            for lang in ["C", "CXX", "OBJC", "OBJCXX"]:
+                tc.variables["CMAKE_%s_COMPILER_LAUNCHER" % lang] = launcher
+            cache_dir = self.conf.get("user.qt:compiler_cache_dir", default=os.path.join(self._cache_folder, launcher))
+            cache_size = self.conf.get("user.qt:compiler_cache_size", default="20G")
+            env = Environment()
+            if launcher == "ccache":
+                env.define_path("CCACHE_DIR", cache_dir)
+                env.define("CCACHE_MAXSIZE", cache_size)
+                env.define_path("CCACHE_BASEDIR", os.path.commonpath([self.source_folder, self.build_folder]))
+                env.define("CCACHE_SLOPPINESS", "pch_defines,time_macros,include_file_mtime,include_file_ctime")
+                env.define("CCACHE_NOHASHDIR", "1")
+            else:
+                env.define_path("SCCACHE_DIR", cache_dir)
+                env.define("SCCACHE_CACHE_SIZE", cache_size)
+            env.vars(self, scope="build").save_script("conanqtcompilercache")
+            self.output.info("Using %s as compiler launcher (cache: %s, max size: %s)" % (launcher, cache_dir, cache_size))
+
+        if self.conf.get("user.qt:configure_cache", default=False, check_type=bool) or self._staged:
+            # The configure results only depend on the toolchain and the configuration, not on the (randomized) folders
+            build_env = ms.vars()
+            key = {"version": str(self.version),
+                   "settings": self.settings.dumps(),
+                   "compiler": [build_env.get("CC", ""), build_env.get("CXX", ""), str(self.conf.get("tools.build:compiler_executables", default={}))],
+                   "toolchain": [str(self.conf.get("tools.cmake.cmaketoolchain:user_toolchain", default=[])), str(self.conf.get("tools.android:ndk_path", default=""))],
+                   "build_requires": sorted(str(dep.pref) for dep in self.dependencies.build.values()),
+                   "variables": sorted((name, str(value)) for name, value in tc.variables.items() if self.build_folder not in str(value)),
+                   "flags": [tc.extra_cflags, tc.extra_cxxflags, tc.extra_sharedlinkflags, tc.extra_exelinkflags]}
+            configure_key = hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+            with open(os.path.join(self.generators_folder, "configure_cache_key"), 'w') as f:
+                f.write(configure_key)
+            self.output.info("Configure cache key: %s" % configure_key)
+            if self._staged:
+                # The stage doesn't depend on the other enabled modules and their inputs (MODULE_INPUTS), but on the
+                # sources, the other requirements and options
+                excluded = {"options": set(QtConan.submodules), "variables": set(), "requires": set()}
+                for module, inputs in MODULE_INPUTS.items():
+                    if module not in self._stage_modules:
+                        for kind, names in inputs.items():
+                            excluded[kind].update(names)
+                key["variables"] = [(name, value) for name, value in key["variables"] if not name.startswith("BUILD_") and name != "QT_BUILD_SUBMODULES" and name not in excluded["variables"]]
+                key.update({"stage_modules": self._stage_modules,
+                            "sources": [self.conan_data["sources"][str(self.version)], self._patches],
+                            "requires": sorted(str(dep.pref) for dep in self.dependencies.host.values() if dep.ref.name not in excluded["requires"]),
+                            "options": [line for line in self.options.dumps().splitlines() if line.split("=")[0] not in excluded["options"]]})
+                stage_key = hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()[:32]
+                with open(os.path.join(self.generators_folder, "stage_key"), 'w') as f:
+                    f.write(stage_key)
+                self.output.info("Stage key: %s (%s)" % (stage_key, ", ".join(self._stage_modules)))
+
         tc.generate()
         ms.generate()
 
     def build(self):
+        missing = [module for module in self._build_modules if not self._has_source(module)]
+        if missing:
+            self._extract_modules(missing)
 
-        if self.get_option("qtdoc"):
-            download(self, **self.conan_data["sources"]["libclang"][str(self.settings.os)])
-            self.run("7z x -y libclang.7z -o%s" % self.build_folder)
+        if "qtdoc" in self._build_modules:
+            archive, _ = self._download(self.conan_data["sources"]["libclang"][str(self.settings.os)])
+            # qdoc only needs the libraries, headers and llvm-config of the prebuilt libclang
+            self.run("7z x -y \"%s\" -o\"%s\" libclang/lib libclang/include libclang/bin" % (archive, self.build_folder))
 
         cmake = CMake(self)
-        #cmake.configure(cli_args=["--log-level=STATUS --debug-trycompile"], build_script_folder="Qt")
-        cmake.configure(build_script_folder="Qt")
+        if self._staged:
+            self._build_staged(cmake)
+            return
+        if self.get_option("pgo"):
+            self._pgo_train(cmake)
+            with self._pgo_flags("use").vars(self).apply():
+                self._configure(cmake)
+        else:
+            self._configure(cmake)
         with open(os.path.join(self.build_folder, "config.summary"), 'r') as f:
             print(f.read())
-        cmake.build()
+        before = self._compiler_cache_stats(reset=True) if self._compiler_cache else None
+        memory = childpeakmemory()
+        cmake.build(build_tool_args=["-j%u" % self._build_jobs])
+        self._report_compiler_cache(before)
+        self._report_build_times(memory)
+        self._report_distributed()
+        if self.get_option("pgo"):
+            self._pgo_report()
+        if self.get_option("benchmarks"):
+            self._benchmark_report()
+
+    @property
+    def _build_jobs(self):
+        # The parallelism of the build: the compile job pool if it includes the slots of distributed workers, otherwise
+        # tools.build:jobs (which Conan passes to Ninja)
+        setup_file = os.path.join(self.generators_folder, "distributed.json")
+        if os.path.isfile(setup_file):
+            with open(setup_file, 'r') as f:
+                return json.load(f)["compile_jobs"]
+        return build_jobs(self)
+
+    def _configure(self, cmake, variables=None):
+        seed = self._configure_cache_seed
+        start = time.monotonic()
+        #cmake.configure(cli_args=["--log-level=STATUS --debug-trycompile"], build_script_folder="Qt")
+        cmake.configure(build_script_folder="Qt", variables=variables, cli_args=["-C", seed] if seed and os.path.isfile(seed) else None)
+        self._report_configure(seed, time.monotonic() - start)
+
+    def _build_staged(self, cmake):
+        # The stage (the enabled STAGE_MODULES) is built by the top level build system and installed to
+        # <cache_folder>/stages/<stage key>, where all variants with the same stage key find it. The other modules are
+        # configured one by one as standalone projects against a copy of the stage (Qt's per-module build) and installed
+        # into it. The copy is packaged.
+        with open(os.path.join(self.generators_folder, "stage_key"), 'r') as f:
+            stage_folder = os.path.join(self._cache_folder, "stages", f.read().strip())
+        prefix = os.path.join(self.build_folder, "prefix")
+        strip = "--strip" if self.get_option("footprint") and not self.get_option("separateDebugInfo") else ""
+        report = {"stage": os.path.basename(stage_folder), "stage_modules": self._stage_modules, "stage_hit": os.path.isdir(stage_folder), "modules": {}}
+        before = self._compiler_cache_stats(reset=True) if self._compiler_cache else None
+        start = time.monotonic()
+        if report["stage_hit"]:
+            self.output.info("Using the Qt stage %s" % stage_folder)
+        else:
+            self.output.info("Building the Qt stage %s" % stage_folder)
+            self._configure(cmake, variables=dict({"QT_BUILD_SUBMODULES": ";".join(self._stage_modules)}, **{"BUILD_" + module: module in self._stage_modules for module in QtConan.submodules}))
+            with open(os.path.join(self.build_folder, "config.summary"), 'r') as f:
+                print(f.read())
+            memory = childpeakmemory()
+            cmake.build(build_tool_args=["-j%u" % self._build_jobs])
+            self._report_build_times(memory)
+            tmp_folder = "%s.%u.tmp" % (stage_folder, os.getpid())
+            self.run('cmake --install "%s" --prefix "%s" %s' % (self.build_folder, tmp_folder, strip))
+            if self._split_dwarf:
+                self._pack_split_dwarf(tmp_folder) # the .dwo files stay in this build folder
+            # The CMake cache of the stage is kept next to it for the variants that reuse the stage (see _cmake_cache)
+            shutil.copyfile(os.path.join(self.build_folder, "CMakeCache.txt"), stage_folder + ".CMakeCache.txt")
+            try:
+                os.replace(tmp_folder, stage_folder)
+            except OSError:
+                shutil.rmtree(tmp_folder, ignore_errors=True) # stored concurrently by another build
+        linktree(stage_folder, prefix, hardlinks=False) # the modules are installed into the copy
+        report["stage_seconds"] = round(time.monotonic() - start, 1)
+        for module in self._build_modules:
+            if module in self._stage_modules:
+                continue
+            start = time.monotonic()
+            module_folder = os.path.join(self.build_folder, "modules", module)
+            self.output.info("Building Qt submodule %s on top of the stage" % module)
+            self.run('cmake -G Ninja -S "%s" -B "%s" -DCMAKE_BUILD_TYPE=%s -DCMAKE_TOOLCHAIN_FILE="%s" -DQT_CHAINLOAD_TOOLCHAIN_FILE="%s"' % (
+                os.path.join(self.source_folder, "Qt", module), module_folder, self.settings.build_type,
+                os.path.join(prefix, "lib", "cmake", "Qt6", "qt.toolchain.cmake"), os.path.join(self.generators_folder, "conan_toolchain.cmake")))
+            self.run('cmake --build "%s" --parallel %u' % (module_folder, self._build_jobs))
+            self.run('cmake --install "%s" %s' % (module_folder, strip))
+            report["modules"][module] = round(time.monotonic() - start, 1)
+        self._report_compiler_cache(before)
+        self._report_distributed()
+        self._write_report("staged_build", report)
+        self.output.info("Staged build: stage %s in %.0fs, %s" % ("reused" if report["stage_hit"] else "built", report["stage_seconds"], ", ".join("%s %.0fs" % item for item in report["modules"].items()) or "no further modules"))
+
+    def _report_distributed(self):
+        # Local vs. remote compile jobs (distcc) and the build time compared to user.qt:build_times_baseline (the
+        # build_times.json of a local build)
+        setup_file = os.path.join(self.generators_folder, "distributed.json")
+        if not os.path.isfile(setup_file):
+            return
+        with open(setup_file, 'r') as f:
+            report = json.load(f)
+        log_file = os.path.join(self.build_folder, "distcc.log")
+        if os.path.isfile(log_file):
+            report["jobs"] = analyzedistcclog(log_file)
+            self.output.info("distcc: %u compile jobs, %u remote, %u local (%u failed to distribute)" % (report["jobs"]["jobs"], report["jobs"]["remote"], report["jobs"]["local"], report["jobs"]["fallback"]))
+            for host, jobs in sorted(report["jobs"]["hosts"].items()):
+                self.output.info("  %-32s %6u jobs" % (host, jobs))
+        times_file = os.path.join(self.build_folder, "reports", "build_times.json")
+        if os.path.isfile(times_file):
+            with open(times_file, 'r') as f:
+                times = json.load(f)
+            report.update({"wall_seconds": times["wall_seconds"], "cpu_seconds": times["cpu_seconds"], "parallelism": round(times["cpu_seconds"] / times["wall_seconds"], 2) if times["wall_seconds"] else 0})
+            baseline_file = self.conf.get("user.qt:build_times_baseline")
+            if baseline_file:
+                with open(baseline_file, 'r') as f:
+                    baseline = json.load(f)
+                report["baseline_wall_seconds"] = baseline["wall_seconds"]
+                report["speedup"] = round(baseline["wall_seconds"] / times["wall_seconds"], 2) if times["wall_seconds"] else 0
+                self.output.info("Distributed build: %.0fs wall vs. %.0fs of the baseline (speedup %.2fx)" % (times["wall_seconds"], baseline["wall_seconds"], report["speedup"]))
+        self._write_report("distributed", report)
+
+    def _report_compiler_cache(self, before):
+        if not self._compiler_cache:
+            return
+        after = self._compiler_cache_stats()
+        hits = after["hits"] - before["hits"]
+        misses = after["misses"] - before["misses"]
+        self.output.info("%s: %u hits, %u misses (%.1f%% hit rate), cache size %.1f MiB" % (self._compiler_cache, hits, misses, 100.0 * hits / (hits + misses) if hits + misses else 0, after["bytes"] / 1048576))
+        self._write_report("compiler_cache", {"launcher": self._compiler_cache, "hits": hits, "misses": misses, "bytes": after["bytes"]})
+
+    def _pgo_flags(self, phase):
+        # CMake picks up CFLAGS, CXXFLAGS and LDFLAGS when the build folder is configured for the first time
+        profile_dir = os.path.join(self.build_folder, "pgo")
+        if self.settings.compiler == "clang":
+            flags = "-fprofile-generate=%s" % profile_dir if phase == "generate" else "-fprofile-use=%s -Wno-profile-instr-unprofiled -Wno-profile-instr-out-of-date" % os.path.join(profile_dir, "qt.profdata")
+        else:
+            flags = "-fprofile-generate=%s -fprofile-update=prefer-atomic" % profile_dir if phase == "generate" else "-fprofile-use=%s -fprofile-partial-training -fprofile-correction -Wno-missing-profile" % profile_dir
+        env = Environment()
+        for var in ["CFLAGS", "CXXFLAGS", "LDFLAGS"]:
+            env.append(var, flags)
+        return env
+
+    def _pgo_train(self, cmake):
+        # Phase 1: instrumented build that runs the training benchmarks. Phase 2 (the regular build) reconfigures the
+        # same build folder from scratch so the object paths (and with it the gcc profile names) stay the same.
+        self.output.info("PGO: building instrumented Qt")
+        with self._pgo_flags("generate").vars(self).apply():
+            self._configure(cmake)
+            cmake.build(build_tool_args=["-j%u" % self._build_jobs])
+            executables = self._build_benchmarks(PGO_TRAINING_BENCHMARKS)
+            if not executables:
+                raise ConanException("PGO: no training benchmarks were generated for %s" % ", ".join(module for module in PGO_TRAINING_BENCHMARKS if module in self._build_modules))
+            self.output.info("PGO: running %u training benchmarks" % len(executables))
+            self._run_benchmarks(executables, 1)
+        if self.settings.compiler == "clang":
+            profiles = glob.glob(os.path.join(self.build_folder, "pgo", "*.profraw"))
+            if not profiles:
+                raise ConanException("PGO: the training benchmarks didn't write any profile to %s" % os.path.join(self.build_folder, "pgo"))
+            self.run('llvm-profdata merge -output="%s" %s' % (os.path.join(self.build_folder, "pgo", "qt.profdata"), " ".join('"%s"' % f for f in profiles)))
+        os.remove(os.path.join(self.build_folder, "CMakeCache.txt"))
+        shutil.rmtree(os.path.join(self.build_folder, "CMakeFiles"))
+
+    def _pgo_report(self):
+        executables = self._build_benchmarks(PGO_TRAINING_BENCHMARKS)
+        results = self._run_benchmarks(executables, self.conf.get("user.qt:benchmark_repeats", default=5, check_type=int))
+        report = {"results": results}
+        baseline = self.conf.get("user.qt:pgo_baseline", default=None)
+        if baseline:
+            with open(baseline, 'r') as f:
+                report["comparison"] = comparebenchmarks(json.load(f)["results"], results)
+            for name, entry in sorted(report["comparison"].items(), key=lambda item: item[1]["delta"]):
+                self.output.info("  %-80s %+6.1f%%%s" % (name, entry["delta"] * 100, "" if entry["significant"] else " (not significant)"))
+            if report["comparison"]:
+                self.output.info("PGO: mean runtime change versus %s: %+.1f%%" % (baseline, 100 * sum(entry["delta"] for entry in report["comparison"].values()) / len(report["comparison"])))
+        self._write_report("pgo", report)
+
+    def _benchmark_report(self):
+        executables = self._build_benchmarks({module: ["tests/benchmarks"] for module in self._build_modules})
+        if not executables:
+            raise ConanException("No benchmarks were generated for %s" % ", ".join(self._build_modules))
+        self.output.info("Running %u benchmarks" % len(executables))
+        results = self._run_benchmarks(executables, self.conf.get("user.qt:benchmark_repeats", default=5, check_type=int))
+        self._write_report("benchmarks", {"reference": "%s/%s@%s/%s" % (self.name, self.version, self.user, self.channel), "settings": self.settings.dumps(), "options": self.options.dumps(), "results": results})
+
+    def _build_benchmarks(self, benchmarks):
+        # Builds the benchmark executables located in the given submodule folders and returns their paths
+        subdirs = ["%s/%s" % (module, folder) for module, folders in benchmarks.items() if module in self._build_modules for folder in folders]
+        out = io.StringIO()
+        self.run("ninja -t targets all", cwd=self.build_folder, stdout=out, quiet=True)
+        targets = []
+        for line in out.getvalue().splitlines():
+            output, _, rule = line.partition(": ")
+            if "EXECUTABLE_LINKER" in rule and any(output.startswith(subdir + "/") for subdir in subdirs):
+                targets.append(output)
+        if targets:
+            self.run("cmake --build . --target %s" % " ".join(targets), cwd=self.build_folder)
+        return [os.path.join(self.build_folder, target) for target in targets]
+
+    def _run_benchmarks(self, executables, repeats):
+        # Runs the benchmarks headless (offscreen platform plugin) and returns the samples of every benchmark
+        env = dict(os.environ)
+        env["QT_QPA_PLATFORM"] = "offscreen"
+        env["QT_PLUGIN_PATH"] = os.path.join(self.build_folder, "qtbase", "plugins")
+        env["QML_IMPORT_PATH"] = os.path.join(self.build_folder, "qtbase", "qml")
+        timeout = self.conf.get("user.qt:benchmark_timeout", default=600, check_type=int)
+        results = {}
+        for executable in executables:
+            output = executable + ".xml"
+            for _ in range(repeats):
+                try:
+                    subprocess.run([executable, "-o", "%s,xml" % output], env=env, cwd=os.path.dirname(executable), timeout=timeout, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                    with open(output, 'r') as f:
+                        parsed = parsebenchmarkxml(f.read())
+                except (subprocess.TimeoutExpired, OSError, SyntaxError) as e:
+                    self.output.warning("Benchmark %s failed: %s" % (os.path.basename(executable), e))
+                    break
+                for name, result in parsed.items():
+                    results.setdefault(name, {"metric": result["metric"], "samples": []})["samples"].append(result["value"])
+        return results
+
+    @property
+    def _configure_cache_seed(self):
+        key_file = os.path.join(self.generators_folder, "configure_cache_key")
+        if not os.path.isfile(key_file):
+            return None
+        with open(key_file, 'r') as f:
+            return os.path.join(self._cache_folder, "configure", "%s.cmake" % f.read().strip())
+
+    def _report_configure(self, seed, seconds):
+        # Stores the results of Qt's configure tests (TEST_*, HAVE_*) as initial cache script for the next configure
+        # with the same key. A seeded configure skips those try_compile checks.
+        if not seed:
+            self.output.info("Configure took %.1fs" % seconds)
+            self._write_report("configure", {"seconds": seconds, "cache": "off"})
+            return
+        if os.path.isfile(seed):
+            with open(seed[:-len(".cmake")] + ".json", 'r') as f:
+                uncached = json.load(f)["seconds"]
+            self.output.info("Configure took %.1fs using the configure cache (%.1fs without)" % (seconds, uncached))
+            self._write_report("configure", {"seconds": seconds, "cache": "hit", "uncached_seconds": uncached})
+            return
+        entries = readcmakecache(os.path.join(self.build_folder, "CMakeCache.txt"))
+        lines = []
+        for name, (kind, value) in sorted(entries.items()):
+            if re.match(r"^(TEST_|HAVE_|CMAKE_HAVE_)", name) and kind == "INTERNAL" and name not in ["TEST_libclang"]:
+                lines.append('set(%s "%s" CACHE INTERNAL "")' % (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("$", "\\$")))
+        os.makedirs(os.path.dirname(seed), exist_ok=True)
+        with open(seed + ".tmp", 'w') as f:
+            f.write("\n".join(lines) + "\n")
+        with open(seed[:-len(".cmake")] + ".json", 'w') as f:
+            json.dump({"seconds": seconds, "entries": len(lines)}, f)
+        os.replace(seed + ".tmp", seed)
+        self.output.info("Configure took %.1fs - stored %u configure results in the configure cache" % (seconds, len(lines)))
+        self._write_report("configure", {"seconds": seconds, "cache": "miss", "entries": len(lines)})
+
+    def _write_report(self, name, data):
+        # Reports are written to <build folder>/reports and shipped in the package metadata
+        os.makedirs(os.path.join(self.build_folder, "reports"), exist_ok=True)
+        with open(os.path.join(self.build_folder, "reports", "%s.json" % name), 'w') as f:
+            json.dump(data, f, indent=2)
+
+    def _report_build_times(self, memory_before=None):
+        log_file = os.path.join(self.build_folder, ".ninja_log")
+        if not os.path.isfile(log_file):
+            return
+        report = analyzeninjalog(log_file, QtConan.submodules)
+        memory = childpeakmemory()
+        if memory is not None and memory_before is not None:
+            # The peak of the largest single build job (compile or link) if it exceeds the peak of every process Conan
+            # ran before the build (e.g. the builds of the dependencies in the same conan create), otherwise unknown
+            report["peak_job_memory_mib"] = round(memory, 1) if memory > memory_before else None
+        self._write_report("build_times", report)
+        top = self.conf.get("user.qt:build_report_top", default=10, check_type=int)
+        self.output.info("Build time: %.0fs wall, %.0fs cpu in %u steps" % (report["wall_seconds"], report["cpu_seconds"], report["steps"]))
+        if report.get("peak_job_memory_mib"):
+            self.output.info("Peak memory of a single build job: %.0f MiB" % report["peak_job_memory_mib"])
+        elif "peak_job_memory_mib" in report:
+            self.output.info("Peak memory of a single build job: unknown (below %.0f MiB of an earlier process)" % memory_before)
+        for module, entry in sorted(report["modules"].items(), key=lambda item: item[1]["compile"] + item[1]["link"] + item[1]["other"], reverse=True):
+            self.output.info("  %-24s compile %8.0fs  link %7.0fs  other %7.0fs" % (module, entry["compile"], entry["link"], entry["other"]))
+        self.output.info("Slowest targets:")
+        for target, entry in sorted(report["targets"].items(), key=lambda item: item[1]["compile"] + item[1]["link"] + item[1]["other"], reverse=True)[:top]:
+            self.output.info("  %-48s %8.0fs" % (target, entry["compile"] + entry["link"] + entry["other"]))
+        self.output.info("Slowest translation units:")
+        for unit in report["translation_units"][:top]:
+            self.output.info("  %-80s %6.1fs" % (unit["unit"], unit["seconds"]))
+
+    def _compiler_cache_stats(self, reset=False):
+        # Returns the accumulated hits, misses and the current cache size in bytes
+        out = io.StringIO()
+        if self._compiler_cache == "ccache":
+            self.run("ccache --print-stats", stdout=out, quiet=True)
+            values = dict(line.split("\t", 1) for line in out.getvalue().splitlines() if "\t" in line)
+            return {"hits": int(values.get("direct_cache_hit", 0)) + int(values.get("preprocessed_cache_hit", 0)),
+                    "misses": int(values.get("cache_miss", 0)),
+                    "bytes": int(values.get("cache_size_kibibyte", 0)) * 1024}
+        if reset:
+            self.run("sccache --zero-stats", stdout=io.StringIO(), quiet=True)
+        self.run("sccache --show-stats --stats-format=json", stdout=out, quiet=True)
+        values = json.loads(out.getvalue())
+        return {"hits": sum(values["stats"]["cache_hits"]["counts"].values()),
+                "misses": sum(values["stats"]["cache_misses"]["counts"].values()),
+                "bytes": values.get("cache_size") or 0}
 
     def package(self):
         os.mkdir(os.path.join(self.package_folder, "include")) # macos: if only qtcore is built, include folder is missing but required by find_package(Qt6 REQUIRED Core)
-        cmake = CMake(self)
-        cmake.install()
+        if self._staged:
+            linktree(os.path.join(self.build_folder, "prefix"), self.package_folder)
+        else:
+            cmake = CMake(self)
+            cmake.install(cli_args=["--strip"] if self.get_option("footprint") and not self.get_option("separateDebugInfo") else None)
+        if self._split_dwarf:
+            self._pack_split_dwarf(self.package_folder)
+        if self.get_option("separateDebugInfo"):
+            self._separate_debug_info()
+        if self.get_option("prune"):
+            self._prune()
+        if not self.get_option("shared"):
+            self._plugin_report()
+        if self.settings.os in ["Linux", "Android"]:
+            self._size_report()
+        copy(self, "*.json", src=os.path.join(self.build_folder, "reports"), dst=os.path.join(self.package_metadata_folder, "reports"))
+
+    @property
+    def _cmake_cache(self):
+        # The CMake cache of the top level build or (staged build) of the reused stage or of a module built on top of it
+        cache_files = [os.path.join(self.build_folder, "CMakeCache.txt")]
+        key_file = os.path.join(self.generators_folder, "stage_key")
+        if self._staged and os.path.isfile(key_file):
+            with open(key_file, 'r') as f:
+                cache_files.append(os.path.join(self._cache_folder, "stages", f.read().strip() + ".CMakeCache.txt"))
+        cache_files += sorted(glob.glob(os.path.join(self.build_folder, "modules", "*", "CMakeCache.txt")))
+        for cache_file in cache_files:
+            if os.path.isfile(cache_file):
+                return readcmakecache(cache_file)
+        return {}
+
+    def _plugin_report(self):
+        # Static builds: records the built plugins per module and selects the platform, OpenGL integration, multimedia and
+        # TLS plugins that match the options. lib/cmake/QtConanPlugins.cmake provides qt_conan_import_plugins(<target>),
+        # which imports the selected plugins of these types and leaves the other types to Qt's defaults.
+        targets = readqttargets(self.package_folder)
+        plugins = {}
+        for config in glob.glob(os.path.join(self.package_folder, "lib", "cmake", "Qt6*", "Qt6*PluginConfig.cmake")):
+            name = os.path.basename(config)[len("Qt6"):-len("Config.cmake")]
+            location = targets.get(name, {}).get("location")
+            if not location or not location.startswith("plugins/"):
+                continue
+            stem = libraryname(os.path.basename(location))
+            if self.settings.os == "Windows" and self.settings.build_type == "Debug" and stem.endswith("d"):
+                stem = stem[:-1]
+            plugins[name] = {"module": os.path.basename(os.path.dirname(config))[len("Qt6"):], "type": location.split("/")[1], "name": stem, "file": location}
+        platform = self._cmake_cache.get("QT_QPA_DEFAULT_PLATFORM", (None, ""))[1] or DEFAULT_PLATFORMS.get(str(self.settings.os))
+        wanted = {}
+        if platform:
+            wanted["platforms"] = ["qtforandroid" if platform == "android" else "q" + platform]
+        if platform == "xcb":
+            wanted["xcbglintegrations"] = [] if self.get_option("opengl") in [None, "no"] else ["qxcb-glx-integration" if self.get_option("opengl") == "desktop" else "qxcb-egl-integration"]
+        if self.get_option("mmPlugin"):
+            wanted["multimedia"] = [MULTIMEDIA_PLUGINS[str(self.get_option("mmPlugin"))]]
+        if self.get_option("openssl"):
+            wanted["tls"] = ["qopensslbackend"]
+        built_types = set(plugin["type"] for plugin in plugins.values())
+        selected = {plugin_type: sorted(name for name, plugin in plugins.items() if plugin["type"] == plugin_type and plugin["name"] in names) for plugin_type, names in wanted.items() if plugin_type in built_types}
+        modules = {}
+        for name, plugin in sorted(plugins.items()):
+            modules.setdefault(plugin["module"], []).append(name)
+        self._write_report("plugins", {"platform": platform, "plugins": plugins, "modules": modules, "selected": selected})
+        lines = ["# Generated by the Conan recipe: imports the plugins of this static Qt build that match its options",
+                 "function(qt_conan_import_plugins target)"]
+        for plugin_type, names in sorted(selected.items()):
+            if names:
+                lines.append("    qt_import_plugins(${target} INCLUDE_BY_TYPE %s %s)" % (plugin_type, " ".join("Qt6::" + name for name in names)))
+            else:
+                lines.append("    qt_import_plugins(${target} EXCLUDE_BY_TYPE %s)" % plugin_type)
+        lines += ["    if(ARGN)", "        qt_import_plugins(${target} ${ARGN})", "    endif()", "endfunction()", ""]
+        with open(os.path.join(self.package_folder, "lib", "cmake", "QtConanPlugins.cmake"), 'w') as f:
+            f.write("\n".join(lines))
+        self.output.info("Plugins selected by the options: %s" % (", ".join(name for names in selected.values() for name in names) or "none"))
+
+    def _pack_split_dwarf(self, folder):
+        # -gsplit-dwarf leaves the debug info in the .dwo files of the build folder and only a skeleton in the binaries.
+        # dwp packs the .dwo files of every ELF file in folder into <file>.dwp next to it, where gdb looks for it.
+        # llvm-dwp also reads the DWARF 5 of current gcc versions (binutils' dwp only supports DWARF 4).
+        dwp = shutil.which("llvm-dwp") or shutil.which("dwp")
+        if not dwp:
+            raise ConanException("splitDwarf needs llvm-dwp (or binutils' dwp) to package the debug info of the .dwo files")
+        count = 0
+        for root, _, names in os.walk(folder):
+            for name in names:
+                path = os.path.join(root, name)
+                if os.path.islink(path) or name.endswith((".o", ".dwp")) or os.path.isfile(path + ".dwp") or not elfsections(path):
+                    continue
+                self.run('"%s" -e "%s" -o "%s"' % (dwp, path, path + ".dwp"))
+                count += os.path.isfile(path + ".dwp") # no output for files without split units
+        self.output.info("Packed the split DWARF of %u files into .dwp files" % count)
+
+    def _separate_debug_info(self):
+        # Moves the debug info of the packaged ELF files to <metadata>/debug/.build-id/<xx>/<rest of the build-id>.debug (the
+        # layout gdb and debuginfod use) and links the stripped files to them with a .gnu_debuglink section. The .dwp
+        # files (splitDwarf) are moved to <metadata>/debug/<file>.dwp, gdb looks for them in its debug-file-directory.
+        objcopy = self._cmake_cache.get("CMAKE_OBJCOPY", (None, ""))[1] or "objcopy"
+        debug_folder = os.path.join(self.package_metadata_folder, "debug")
+        report = {"files": {}, "bytes_before": 0, "bytes_after": 0}
+        for root, _, names in os.walk(self.package_folder):
+            for name in names:
+                path = os.path.join(root, name)
+                if os.path.islink(path) or name.endswith(".o") or not elfsections(path):
+                    continue
+                relative = os.path.relpath(path, self.package_folder).replace("\\", "/")
+                if name.endswith(".dwp"):
+                    os.makedirs(debug_folder, exist_ok=True)
+                    os.replace(path, os.path.join(debug_folder, name))
+                    report["files"][relative] = {"debug_file": "debug/" + name, "bytes_before": os.path.getsize(os.path.join(debug_folder, name)), "bytes_after": 0}
+                    report["bytes_before"] += report["files"][relative]["bytes_before"]
+                    continue
+                build_id = elfbuildid(path)
+                debug_file = os.path.join(debug_folder, ".build-id", build_id[:2], build_id[2:] + ".debug") if build_id else os.path.join(debug_folder, relative + ".debug")
+                os.makedirs(os.path.dirname(debug_file), exist_ok=True)
+                size = os.path.getsize(path)
+                self.run('"%s" --only-keep-debug "%s" "%s"' % (objcopy, path, debug_file))
+                self.run('"%s" %s --add-gnu-debuglink="%s" "%s"' % (objcopy, "--strip-all" if self.get_option("footprint") else "--strip-debug", debug_file, path))
+                report["files"][relative] = {"build_id": build_id, "debug_file": os.path.relpath(debug_file, self.package_metadata_folder).replace("\\", "/"), "bytes_before": size, "bytes_after": os.path.getsize(path)}
+                report["bytes_before"] += size
+                report["bytes_after"] += os.path.getsize(path)
+        self._write_report("debug_info", report)
+        self.output.info("Moved the debug info of %u files to the package metadata (%.1f MiB -> %.1f MiB)" % (len(report["files"]), report["bytes_before"] / 1048576, report["bytes_after"] / 1048576))
+
+    def _prune(self):
+        # Removes the files that match a deny pattern of conandata.yml but no allow pattern from the package. The mkspec
+        # Qt6::Platform adds to the include path and the files it includes are always kept, and so are the .prl files of
+        # static builds (qmake reads the link dependencies of the static libraries from them).
+        deny = self.conan_data["prune"]["deny"]
+        allow = list(self.conan_data["prune"].get("allow", []))
+        if not self.get_option("shared"):
+            allow.append("*.prl")
+        for mkspec in readqttargets(self.package_folder).get("Platform", {}).get("includedirs", []):
+            if mkspec.startswith("mkspecs/"):
+                allow.extend(sorted(mkspecfiles(self.package_folder, mkspec)))
+        removed = {}
+        for root, _, names in os.walk(self.package_folder, topdown=False):
+            for name in names:
+                path = os.path.join(root, name)
+                relative = os.path.relpath(path, self.package_folder).replace("\\", "/")
+                if any(fnmatch.fnmatchcase(relative, pattern) for pattern in deny) and not any(fnmatch.fnmatchcase(relative, pattern) for pattern in allow):
+                    removed[relative] = os.lstat(path).st_size
+                    os.remove(path)
+            if os.path.dirname(root) != self.package_folder and root != self.package_folder and not os.listdir(root):
+                os.rmdir(root)
+        self._write_report("pruned", {"deny": deny, "allow": allow, "files": removed, "bytes": sum(removed.values())})
+        self.output.info("Pruned %u files (%.1f MiB) from the package" % (len(removed), sum(removed.values()) / 1048576))
+
+    def _size_report(self):
+        # Sizes of the packaged shared libraries, plugins and QML plugins, compared to user.qt:size_baseline if set
+        libraries = {}
+        for folder in ["lib", "plugins", "qml"]:
+            for path in glob.glob(os.path.join(self.package_folder, folder, "**", "*.so*"), recursive=True):
+                sizes = None if os.path.islink(path) or path.endswith(".dwp") else elfsizes(path)
+                if sizes:
+                    libraries[os.path.relpath(path, self.package_folder).replace("\\", "/")] = sizes
+        keys = ["text", "data", "bss", "file"]
+        report = {"footprint": bool(self.get_option("footprint")), "libraries": libraries, "totals": {key: sum(sizes[key] for sizes in libraries.values()) for key in keys}}
+        self.output.info("Library sizes: text %.1f MiB, data %.1f MiB, bss %.1f MiB, files %.1f MiB" % tuple(report["totals"][key] / 1048576 for key in keys))
+        baseline_file = self.conf.get("user.qt:size_baseline")
+        if baseline_file:
+            with open(baseline_file, 'r') as f:
+                baseline = json.load(f)["libraries"]
+            common = [name for name in libraries if name in baseline]
+            report["baseline"] = baseline_file
+            report["delta"] = {name: {key: libraries[name][key] - baseline[name][key] for key in keys} for name in common}
+            report["delta_totals"] = {key: sum(report["delta"][name][key] for name in common) for key in keys}
+            self.output.info("Compared to %s (%u libraries): text %+.1f KiB, data %+.1f KiB, bss %+.1f KiB, files %+.1f KiB" % ((baseline_file, len(common)) + tuple(report["delta_totals"][key] / 1024 for key in keys)))
+        self._write_report("sizes", report)
 
     def package_info(self):
         self.cpp_info.set_property("cmake_find_mode", "none")
@@ -600,8 +2164,9 @@ class QtConan(ConanFile):
         else:
             self.runenv_info.prepend_path("QML_IMPORT_PATH", os.path.join(self.package_folder, "qml"))
             self.cpp_info.builddirs = ["lib/cmake"]
+            self._define_components()
         
-        if self.get_option("qtdoc"):
+        if "qtdoc" in self._build_modules:
             self.buildenv_info.define_path("QT_INSTALL_DOCS", os.path.join(self.package_folder, "doc"))
 
         if not cross_building(self):
@@ -612,3 +2177,33 @@ class QtConan(ConanFile):
             Qt = self.dependencies.build[self.name]
             self.output.info('Forwarding build environment from Qt Host: %s' % Qt.package_folder)
             self.buildenv_info.compose_env(Qt.buildenv_info)
+
+    def _define_components(self):
+        # One component per library target of Qt's installed CMake packages (and per plugin of static builds) for
+        # generators other than CMakeDeps (CMake consumers use Qt's own packages). Object libraries aren't covered.
+        targets = {name: target for name, target in readqttargets(self.package_folder).items() if target["type"] in ["SHARED", "STATIC", "INTERFACE"]}
+        for name, target in targets.items():
+            component = self.cpp_info.components[name]
+            component.set_property("cmake_target_name", "Qt6::%s" % name)
+            component.includedirs = target["includedirs"]
+            component.defines = target["defines"]
+            component.requires = [require for require in target["requires"] if require in targets]
+            component.system_libs = target["system_libs"]
+            component.libdirs = []
+            component.bindirs = ["bin"]
+            location = target["location"]
+            if location and ".framework/" in location:
+                framework = location.split(".framework/")[0]
+                component.frameworkdirs = [os.path.dirname(framework)]
+                component.frameworks = [os.path.basename(framework)]
+            elif location:
+                component.libdirs = [os.path.dirname(location)]
+                component.libs = [libraryname(os.path.basename(location))]
+        if "Core" in targets:
+            self.cpp_info.components["Core"].builddirs = ["lib/cmake"]
+            if self.settings.os == "Linux":
+                self.cpp_info.components["Core"].system_libs.append("pthread")
+        # The Conan requirements are linked by the module that uses them (or by QtCore if it wasn't found)
+        for requirement, module in {"openssl": "Network", "ffmpeg": "Multimedia", "zstd": "Core", "brotli": "Network"}.items():
+            if requirement in self.dependencies.host:
+                self.cpp_info.components[module if module in targets else "Core"].requires.append("%s::%s" % (requirement, requirement))
@@ -0,0 +1,8 @@
+# Generated by CMake
+
+# Import target "Qt6::Core" for configuration "Release"
+set_property(TARGET Qt6::Core APPEND PROPERTY IMPORTED_CONFIGURATIONS RELEASE)
+set_target_properties(Qt6::Core PROPERTIES
+  IMPORTED_LOCATION_RELEASE "${_IMPORT_PREFIX}/lib/libQt6Core.so.6.10.0"
+  IMPORTED_SONAME_RELEASE "libQt6Core.so.6"
+  )
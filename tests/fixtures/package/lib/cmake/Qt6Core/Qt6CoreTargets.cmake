@@ -0,0 +1,11 @@
+# Generated by CMake
+
+# Create imported target Qt6::Core
+add_library(Qt6::Core SHARED IMPORTED)
+
+set_target_properties(Qt6::Core PROPERTIES
+  INTERFACE_COMPILE_DEFINITIONS "QT_CORE_LIB;\$<\$<CONFIG:Release>:QT_NO_DEBUG>"
+  INTERFACE_INCLUDE_DIRECTORIES "${_IMPORT_PREFIX}/include/QtCore;${_IMPORT_PREFIX}/include"
+  INTERFACE_LINK_LIBRARIES "Qt6::Platform;\$<LINK_ONLY:WrapAtomic::WrapAtomic>;-ldl;\$<\$<BOOL:FALSE>:rt>"
+  _qt_package_version "6.10.0"
+)
@@ -0,0 +1,4 @@
+set_target_properties(Qt6::Gui PROPERTIES
+  IMPORTED_LINK_INTERFACE_LANGUAGES_RELEASE "CXX"
+  IMPORTED_LOCATION_RELEASE "${_IMPORT_PREFIX}/lib/libQt6Gui.a"
+  )
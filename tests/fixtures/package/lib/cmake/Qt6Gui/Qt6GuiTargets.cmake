@@ -0,0 +1,10 @@
+# Generated by CMake
+
+# Create imported target Qt6::Gui
+add_library(Qt6::Gui STATIC IMPORTED)
+
+set_target_properties(Qt6::Gui PROPERTIES
+  INTERFACE_COMPILE_DEFINITIONS "QT_GUI_LIB"
+  INTERFACE_INCLUDE_DIRECTORIES "${_IMPORT_PREFIX}/include/QtGui;${_IMPORT_PREFIX}/include"
+  INTERFACE_LINK_LIBRARIES "Qt6::Core;\$<LINK_ONLY:Qt6::BundledHarfbuzz>;EGL::EGL;\$<LINK_ONLY:-lm>"
+)
@@ -0,0 +1 @@
+#include <unistd.h>
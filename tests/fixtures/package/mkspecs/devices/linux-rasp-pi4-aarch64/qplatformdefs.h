@@ -0,0 +1 @@
+#include "../../linux-g++/qplatformdefs.h"
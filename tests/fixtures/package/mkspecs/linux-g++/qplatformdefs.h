@@ -0,0 +1 @@
+#include "../common/posix/qplatformdefs.h"
@@ -0,0 +1 @@
+QT_CONFIG += c++17
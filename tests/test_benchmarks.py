@@ -0,0 +1,31 @@
+import os
+import sys
+import unittest
+
+# The recipe reads info.json and qtmodules/ relative to the working directory when it is loaded
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+from conanfile import parsebenchmarkxml
+
+class ParseBenchmarkXmlTest(unittest.TestCase):
+    def setUp(self):
+        # Output of a QtTest benchmark run with -o <file>,xml
+        with open(os.path.join(ROOT, "tests", "fixtures", "qtestbenchmark.xml"), 'r') as f:
+            self.results = parsebenchmarkxml(f.read())
+
+    def test_results(self):
+        self.assertEqual(sorted(self.results), ["tst_QString::arg", "tst_QString::toUpper(ascii)", "tst_QString::toUpper(latin1)"])
+
+    def test_value_per_iteration(self):
+        # The value is already per iteration, the iteration count must not be applied again
+        self.assertEqual(self.results["tst_QString::toUpper(ascii)"]["metric"], "WalltimeNanoseconds")
+        self.assertAlmostEqual(self.results["tst_QString::toUpper(ascii)"]["value"], 44.2)
+        self.assertAlmostEqual(self.results["tst_QString::toUpper(latin1)"]["value"], 118)
+
+    def test_other_metrics_unchanged(self):
+        self.assertEqual(self.results["tst_QString::arg"], {"metric": "InstructionReads", "value": 1843})
+
+if __name__ == "__main__":
+    unittest.main()
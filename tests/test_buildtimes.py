@@ -0,0 +1,53 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# The recipe reads info.json and qtmodules/ relative to the working directory when it is loaded
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+from conanfile import analyzeninjalog
+
+FIXTURE = os.path.join(ROOT, "tests", "fixtures", "ninja")
+MODULES = ["qtbase", "qtsvg"]
+
+class AnalyzeNinjaLogTest(unittest.TestCase):
+    def setUp(self):
+        self.report = analyzeninjalog(os.path.join(FIXTURE, "ninja_log"), MODULES)
+
+    def test_link_steps_attributed_to_the_module_of_their_objects(self):
+        self.assertEqual(self.report["modules"]["qtsvg"]["link"], 0.7)
+        self.assertEqual(self.report["modules"]["qtbase"]["link"], 2.0)
+        self.assertEqual(self.report["targets"]["qtsvg/Svg"]["link"], 0.5)
+        self.assertEqual(self.report["targets"]["qtsvg/QSvgPlugin"]["link"], 0.2)
+        self.assertEqual(self.report["targets"]["qtbase/Core"]["link"], 2.0)
+
+    def test_steps_counted_once(self):
+        # The symlink edges are not counted and the two outputs of the moc edge are one step
+        self.assertEqual(self.report["steps"], 8)
+        self.assertEqual(self.report["modules"]["qtbase"]["other"], 0.3)
+        self.assertAlmostEqual(self.report["cpu_seconds"], 4.2 + 0.3 + 2.0 + 1.0 + 0.8 + 0.5 + 0.2)
+        self.assertEqual(self.report["wall_seconds"], 6.715)
+
+    def test_last_build_of_an_output(self):
+        units = {unit["unit"]: unit for unit in self.report["translation_units"]}
+        self.assertEqual(units["qtbase/src/corelib/CMakeFiles/Core.dir/global/qglobal.cpp.o"]["seconds"], 1.2)
+        self.assertEqual(self.report["translation_units"][0]["target"], "Core")
+        self.assertEqual([unit["seconds"] for unit in self.report["translation_units"]], [3.0, 1.2, 1.0, 0.8])
+
+    def test_without_build_ninja(self):
+        # The link steps can only be attributed by their output path, the edges are still deduplicated
+        folder = tempfile.mkdtemp()
+        try:
+            shutil.copy(os.path.join(FIXTURE, "ninja_log"), folder)
+            report = analyzeninjalog(os.path.join(folder, "ninja_log"), MODULES)
+        finally:
+            shutil.rmtree(folder)
+        self.assertEqual(report["steps"], 10)
+        self.assertEqual(report["modules"]["qtsvg"]["compile"], 1.8)
+
+if __name__ == "__main__":
+    unittest.main()
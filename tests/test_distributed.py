@@ -0,0 +1,74 @@
+import os
+import socket
+import sys
+import unittest
+from unittest import mock
+
+# The recipe reads info.json and qtmodules/ relative to the working directory when it is loaded
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+import conanfile
+from conanfile import analyzedistcclog, distcchosts
+
+class DistccHostsTest(unittest.TestCase):
+    def probe(self, hosts, reachable=lambda address: True):
+        # Returns distcchosts() and the addresses it connected to
+        connections = []
+        def connect(address, timeout=None):
+            connections.append(address)
+            if not reachable(address):
+                raise ConnectionRefusedError()
+            return mock.Mock()
+        with mock.patch.object(conanfile.socket, "create_connection", connect):
+            return distcchosts(hosts), connections
+
+    def test_host_forms(self):
+        hosts = ["build1", "build2/8", "build3:3700", "build4:3700/6,lzo", "build5/2,lzo,cpp", "@build6/12", "ci@build7", "localhost/2"]
+        reachable, connections = self.probe(hosts)
+        self.assertEqual(reachable, [("build1", 4), ("build2/8", 8), ("build3:3700", 4), ("build4:3700/6,lzo", 6), ("build5/2,lzo,cpp", 2),
+                                     ("@build6/12", 12), ("ci@build7", 4), ("localhost/2", 2)])
+        # distccd listens on 3632, the ssh hosts are checked on the ssh port, localhost needs no daemon
+        self.assertEqual(connections, [("build1", 3632), ("build2", 3632), ("build3", 3700), ("build4", 3700), ("build5", 3632), ("build6", 22), ("build7", 22)])
+
+    def test_unreachable_hosts_dropped(self):
+        reachable, _ = self.probe(["build1/8", "build2/8"], reachable=lambda address: address[0] == "build2")
+        self.assertEqual(reachable, [("build2/8", 8)])
+
+    def test_options_kept(self):
+        reachable, connections = self.probe(["--randomize", "+zeroconf", "build1"])
+        self.assertEqual(reachable, [("--randomize", 0), ("+zeroconf", 0), ("build1", 4)])
+        self.assertEqual(connections, [("build1", 3632)])
+
+    def test_invalid_limit(self):
+        reachable, _ = self.probe(["build1/many"])
+        self.assertEqual(reachable, [("build1/many", 4)])
+
+    def test_connection(self):
+        # Against a real listening socket and a closed port
+        server = socket.socket()
+        server.bind(("127.0.0.1", 0))
+        server.listen()
+        closed = socket.socket()
+        closed.bind(("127.0.0.1", 0))
+        port, closed_port = server.getsockname()[1], closed.getsockname()[1]
+        closed.close()
+        try:
+            self.assertEqual(distcchosts(["127.0.0.1:%u/3" % port, "127.0.0.1:%u/3" % closed_port]), [("127.0.0.1:%u/3" % port, 3)])
+        finally:
+            server.close()
+
+class AnalyzeDistccLogTest(unittest.TestCase):
+    def test_log(self):
+        # Job summaries of a verbose distcc client log, mixed with lines that are no job summaries, truncated lines and
+        # invalid UTF-8
+        report = analyzedistcclog(os.path.join(ROOT, "tests", "fixtures", "distcc.log"))
+        self.assertEqual(report["hosts"], {"192.168.1.10:3632": 2, "192.168.1.11:3632": 2, "localhost": 1})
+        self.assertEqual(report["jobs"], 5)
+        self.assertEqual(report["remote"], 4)
+        self.assertEqual(report["local"], 1)
+        self.assertEqual(report["fallback"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+import hashlib
+import http.client
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import urllib.error
+
+# The recipe reads info.json and qtmodules/ relative to the working directory when it is loaded
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+from conan.errors import ConanException
+from conanfile import fetchartifact, fetchsha256
+
+class Response(io.BytesIO):
+    def __init__(self, content, status=200, headers=None, truncated=False):
+        super().__init__(content)
+        self.status = status
+        self.headers = headers or {}
+        self.truncated = truncated
+
+    def read(self, size=-1):
+        block = super().read(size)
+        if not block and self.truncated:
+            raise http.client.IncompleteRead(b"")
+        return block
+
+class Server:
+    # Stand-in for urllib.request.urlopen serving {url: content}. Requests to other urls fail like an unreachable host.
+    def __init__(self, files, ranges=True, truncate=None, ignore_ranges=()):
+        self.files = files
+        self.ranges = ranges
+        self.ignore_ranges = ignore_ranges # urls that announce range support but always send the whole file
+        self.truncate = truncate # (url, bytes) delivered before the connection is closed
+        self.requests = []
+
+    def __call__(self, request, timeout=None):
+        url = request if isinstance(request, str) else request.full_url
+        method = "GET" if isinstance(request, str) else request.get_method()
+        requested = None if isinstance(request, str) else request.get_header("Range")
+        self.requests.append((method, url, requested))
+        if url not in self.files:
+            raise urllib.error.URLError("unreachable")
+        content = self.files[url]
+        if method == "HEAD":
+            return Response(b"", headers={"Content-Length": str(len(content)), "Accept-Ranges": "bytes" if self.ranges else "none"})
+        status = 200
+        if requested and self.ranges and url not in self.ignore_ranges:
+            first, last = requested[len("bytes="):].split("-")
+            content = content[int(first):int(last) + 1]
+            status = 206
+        if self.truncate and self.truncate[0] == url:
+            return Response(content[:self.truncate[1]], status, truncated=True)
+        return Response(content, status)
+
+CONTENT = bytes(range(256)) * 40
+SHA256 = hashlib.sha256(CONTENT).hexdigest()
+URL = "https://mirror.example/qt.tar.xz"
+MIRROR = "https://other.example/qt.tar.xz"
+
+class FetchArtifactTest(unittest.TestCase):
+    def setUp(self):
+        self.store = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.store)
+
+    def assertStored(self, path):
+        self.assertEqual(path, os.path.join(self.store, SHA256))
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), CONTENT)
+        self.assertEqual(os.listdir(os.path.join(self.store, "partial")), [])
+
+    def test_range_chunks(self):
+        server = Server({URL: CONTENT})
+        path, report = fetchartifact([URL], SHA256, self.store, jobs=4, chunk_size=1024, urlopen=server)
+        self.assertStored(path)
+        self.assertEqual(report["chunks"], 4)
+        self.assertEqual(report["bytes"], len(CONTENT))
+        self.assertEqual(sorted(r for _, _, r in server.requests if r), ["bytes=0-2559", "bytes=2560-5119", "bytes=5120-7679", "bytes=7680-10239"])
+
+    def test_resume(self):
+        partial = os.path.join(self.store, "partial", "qt.tar.xz")
+        os.makedirs(os.path.dirname(partial))
+        with open(partial + ".json", 'w') as f:
+            json.dump({"size": len(CONTENT), "chunks": 2}, f)
+        with open(partial + ".part0", 'wb') as f:
+            f.write(CONTENT[:1000])
+        with open(partial + ".part1", 'wb') as f:
+            f.write(CONTENT[5120:])
+        server = Server({URL: CONTENT})
+        path, report = fetchartifact([URL], SHA256, self.store, jobs=2, chunk_size=8192, urlopen=server)
+        self.assertStored(path)
+        self.assertEqual(report["resumed_bytes"], 1000 + 5120)
+        self.assertEqual(report["bytes"], 5120 - 1000)
+        self.assertEqual([r for _, _, r in server.requests if r], ["bytes=1000-5119"]) # the complete chunk isn't requested
+
+    def test_resume_after_truncated_mirror(self):
+        server = Server({URL: CONTENT}, truncate=(URL, 100))
+        with self.assertRaises(ConanException):
+            fetchartifact([URL], SHA256, self.store, jobs=1, chunk_size=len(CONTENT), urlopen=server)
+        server.truncate = None
+        path, report = fetchartifact([URL], SHA256, self.store, jobs=1, chunk_size=len(CONTENT), urlopen=server)
+        self.assertStored(path)
+        self.assertEqual(report["resumed_bytes"], 100)
+        self.assertEqual(server.requests[-1][2], "bytes=100-%u" % (len(CONTENT) - 1))
+
+    def test_mirror_fallback(self):
+        server = Server({MIRROR: CONTENT})
+        path, report = fetchartifact([URL, MIRROR], SHA256, self.store, urlopen=server)
+        self.assertStored(path)
+        self.assertEqual(report["url"], MIRROR)
+        self.assertEqual(len(report["failed"]), 1)
+        self.assertTrue(report["failed"][0].startswith(URL))
+
+    def test_hash_mismatch_falls_back(self):
+        server = Server({URL: CONTENT[:-1] + b"x", MIRROR: CONTENT})
+        path, report = fetchartifact([URL, MIRROR], SHA256, self.store, urlopen=server)
+        self.assertStored(path)
+        self.assertIn("does not match", report["failed"][0])
+
+    def test_all_mirrors_fail(self):
+        server = Server({URL: CONTENT[:-1] + b"x"})
+        with self.assertRaises(ConanException):
+            fetchartifact([URL, MIRROR], SHA256, self.store, urlopen=server)
+        self.assertFalse(os.path.exists(os.path.join(self.store, SHA256)))
+
+    def test_without_range_support(self):
+        server = Server({URL: CONTENT}, ranges=False)
+        path, report = fetchartifact([URL], SHA256, self.store, chunk_size=1024, urlopen=server)
+        self.assertStored(path)
+        self.assertEqual(report["chunks"], 0)
+        self.assertEqual([(m, r) for m, _, r in server.requests], [("HEAD", None), ("GET", None)])
+
+    def test_range_ignored(self):
+        server = Server({URL: CONTENT, MIRROR: CONTENT}, ignore_ranges=[URL])
+        path, report = fetchartifact([URL, MIRROR], SHA256, self.store, chunk_size=1024, urlopen=server)
+        self.assertStored(path)
+        self.assertIn("range", report["failed"][0])
+
+    def test_cached(self):
+        with open(os.path.join(self.store, SHA256), 'wb') as f:
+            f.write(CONTENT)
+        server = Server({})
+        path, report = fetchartifact([URL], SHA256, self.store, urlopen=server)
+        self.assertTrue(report["cached"])
+        self.assertEqual(server.requests, [])
+
+class FetchSha256Test(unittest.TestCase):
+    def setUp(self):
+        self.store = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.store)
+
+    def test_published_hash_is_indexed(self):
+        server = Server({URL + ".sha256": ("%s  qt.tar.xz\n" % SHA256.upper()).encode()})
+        self.assertEqual(fetchsha256(URL, self.store, urlopen=server), SHA256)
+        self.assertEqual(fetchsha256(URL, self.store, urlopen=Server({})), SHA256) # from the index, offline
+
+    def test_invalid_hash(self):
+        with self.assertRaises(ConanException):
+            fetchsha256(URL, self.store, urlopen=Server({URL + ".sha256": b"<html>not found</html>"}))
+        with self.assertRaises(ConanException):
+            fetchsha256(URL, self.store, urlopen=Server({}))
+        self.assertFalse(os.path.exists(os.path.join(self.store, "index")))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,189 @@
+import json
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import types
+import unittest
+
+# The recipe reads info.json and qtmodules/ relative to the working directory when it is loaded
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+from conanfile import QtConan, elfbuildid, elfsizes
+
+SHT_PROGBITS, SHT_NOTE, SHT_NOBITS = 1, 7, 8
+SHF_WRITE, SHF_ALLOC, SHF_EXECINSTR = 0x1, 0x2, 0x4
+BUILD_ID = bytes(range(1, 21))
+
+def note(order, name, kind, desc):
+    name += b"\0"
+    pad = lambda data: data + b"\0" * (-len(data) % 4)
+    return struct.pack(order + "III", len(name), len(desc), kind) + pad(name) + pad(desc)
+
+def makeelf(path, is64=True, little=True, sections=None, section_table=True):
+    # Writes an ELF file with the given sections ((type, flags, content or size of a NOBITS section)) after the header
+    # and the section header table at the end
+    order = "<" if little else ">"
+    header_size = 64 if is64 else 52
+    data, headers = b"", [(0, 0, 0, 0)] # the null section
+    for kind, flags, content in sections or []:
+        offset = header_size + len(data)
+        if kind == SHT_NOBITS:
+            headers.append((kind, flags, offset, content))
+        else:
+            headers.append((kind, flags, offset, len(content)))
+            data += content
+    shoff = header_size + len(data) if section_table else 0
+    shentsize = (64 if is64 else 40) if section_table else 0
+    shnum = len(headers) if section_table else 0
+    ident = b"\x7fELF" + bytes([2 if is64 else 1, 1 if little else 2, 1]) + b"\0" * 9
+    if is64:
+        header = ident + struct.pack(order + "HHIQQQIHHHHHH", 3, 62, 1, 0, 0, shoff, 0, header_size, 0, 0, shentsize, shnum, 0)
+    else:
+        header = ident + struct.pack(order + "HHIIIIIHHHHHH", 3, 40, 1, 0, 0, shoff, 0, header_size, 0, 0, shentsize, shnum, 0)
+    table = b""
+    for kind, flags, offset, size in headers if section_table else []:
+        if is64:
+            table += struct.pack(order + "IIQQQQIIQQ", 0, kind, flags, 0, offset, size, 0, 0, 1, 0)
+        else:
+            table += struct.pack(order + "IIIIIIIIII", 0, kind, flags, 0, offset, size, 0, 0, 1, 0)
+    with open(path, 'wb') as f:
+        f.write(header + data + table)
+
+def library(order, build_id=True):
+    notes = note(order, b"GNU", 1, b"\0" * 16) # NT_GNU_ABI_TAG before the build-id
+    if build_id:
+        notes += note(order, b"GNU", 3, BUILD_ID)
+    return [(SHT_PROGBITS, SHF_ALLOC | SHF_EXECINSTR, b"\x90" * 100), # .text
+            (SHT_PROGBITS, SHF_ALLOC, b"r" * 30), # .rodata
+            (SHT_NOTE, SHF_ALLOC, notes),
+            (SHT_PROGBITS, SHF_ALLOC | SHF_WRITE, b"d" * 20), # .data
+            (SHT_NOBITS, SHF_ALLOC | SHF_WRITE, 50), # .bss
+            (SHT_PROGBITS, 0, b"c" * 10)] # .comment, not loaded
+
+class ElfTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, "libQt6Core.so.6.10.0")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_classes_and_byte_orders(self):
+        for is64 in [True, False]:
+            for little in [True, False]:
+                with self.subTest(is64=is64, little=little):
+                    sections = library("<" if little else ">")
+                    makeelf(self.path, is64, little, sections)
+                    self.assertEqual(elfsizes(self.path), {"text": 100 + 30 + len(sections[2][2]), "data": 20, "bss": 50, "file": os.path.getsize(self.path)})
+                    self.assertEqual(elfbuildid(self.path), BUILD_ID.hex())
+
+    def test_without_build_id(self):
+        makeelf(self.path, sections=library("<", build_id=False))
+        self.assertIsNone(elfbuildid(self.path))
+        makeelf(self.path, sections=[(SHT_PROGBITS, SHF_ALLOC, b"r" * 30)])
+        self.assertIsNone(elfbuildid(self.path))
+
+    def test_without_section_table(self):
+        makeelf(self.path, is64=False, sections=library("<"), section_table=False)
+        self.assertEqual(elfsizes(self.path), {"text": 0, "data": 0, "bss": 0, "file": os.path.getsize(self.path)})
+        self.assertIsNone(elfbuildid(self.path))
+
+    def test_other_files(self):
+        with open(self.path, 'wb') as f:
+            f.write(b"/* GNU ld script */\nINPUT(libQt6Core.so.6)\n")
+        self.assertIsNone(elfsizes(self.path))
+        self.assertIsNone(elfbuildid(self.path))
+        with open(self.path, 'wb') as f:
+            f.write(b"\x7fELF\x02\x01\x01")
+        self.assertIsNone(elfsizes(self.path))
+
+class SizeReportTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.package = os.path.join(self.folder, "p")
+        for relative in ["lib/libQt6Core.so.6.10.0", "plugins/platforms/libqxcb.so", "qml/QtQuick/libqtquick2plugin.so"]:
+            os.makedirs(os.path.dirname(os.path.join(self.package, relative)), exist_ok=True)
+            makeelf(os.path.join(self.package, relative), sections=library("<"))
+        os.symlink("libQt6Core.so.6.10.0", os.path.join(self.package, "lib", "libQt6Core.so.6"))
+        self.reports = {}
+        self.conf = {}
+        self.recipe = types.SimpleNamespace(package_folder=self.package, get_option=lambda name: {"footprint": False}[name],
+                                            conf=types.SimpleNamespace(get=lambda name: self.conf.get(name)),
+                                            _write_report=lambda name, data: self.reports.update({name: data}),
+                                            output=types.SimpleNamespace(info=lambda message: None))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_report(self):
+        QtConan._size_report(self.recipe)
+        report = self.reports["sizes"]
+        # the symlink is not counted twice
+        self.assertEqual(sorted(report["libraries"]), ["lib/libQt6Core.so.6.10.0", "plugins/platforms/libqxcb.so", "qml/QtQuick/libqtquick2plugin.so"])
+        self.assertEqual(report["totals"]["data"], 3 * 20)
+        self.assertEqual(report["totals"]["bss"], 3 * 50)
+        self.assertNotIn("delta", report)
+
+    def test_baseline(self):
+        QtConan._size_report(self.recipe)
+        baseline = self.reports["sizes"]
+        baseline["libraries"]["lib/libQt6Core.so.6.10.0"]["data"] += 8
+        baseline["libraries"]["lib/libQt6Gui.so.6.10.0"] = dict(baseline["libraries"]["lib/libQt6Core.so.6.10.0"]) # not built anymore
+        self.conf["user.qt:size_baseline"] = os.path.join(self.folder, "sizes.json")
+        with open(self.conf["user.qt:size_baseline"], 'w') as f:
+            json.dump(baseline, f)
+        QtConan._size_report(self.recipe)
+        report = self.reports["sizes"]
+        self.assertEqual(report["delta"]["lib/libQt6Core.so.6.10.0"], {"text": 0, "data": -8, "bss": 0, "file": 0})
+        self.assertEqual(report["delta_totals"], {"text": 0, "data": -8, "bss": 0, "file": 0})
+
+@unittest.skipUnless(shutil.which("gcc") and shutil.which("llvm-dwp") and shutil.which("objcopy"), "gcc, llvm-dwp or objcopy is missing")
+class SplitDwarfTest(unittest.TestCase):
+    # splitDwarf: the .dwo files of the build folder are packed into .dwp files next to the packaged libraries
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.package = os.path.join(self.folder, "p")
+        os.makedirs(os.path.join(self.package, "lib"))
+        build = os.path.join(self.folder, "build")
+        os.makedirs(build)
+        for name, flags in [("Core", ["-gsplit-dwarf"]), ("Gui", [])]: # Gui without split units
+            with open(os.path.join(build, name + ".c"), 'w') as f:
+                f.write("int qt_%s(void) { return 6; }\n" % name)
+            subprocess.run(["gcc", "-g", "-fPIC", "-c", name + ".c", "-o", name + ".o"] + flags, cwd=build, check=True)
+            subprocess.run(["gcc", "-shared", "-Wl,--build-id", name + ".o", "-o", os.path.join(self.package, "lib", "libQt6%s.so.6.10.0" % name)], cwd=build, check=True)
+        self.library = os.path.join(self.package, "lib", "libQt6Core.so.6.10.0")
+        os.symlink("libQt6Core.so.6.10.0", os.path.join(self.package, "lib", "libQt6Core.so.6"))
+        self.reports = {}
+        self.recipe = types.SimpleNamespace(package_folder=self.package, package_metadata_folder=os.path.join(self.folder, "metadata"),
+                                            get_option=lambda name: {"footprint": False}[name], _cmake_cache={},
+                                            run=lambda command: subprocess.run(command, shell=True, check=True),
+                                            _write_report=lambda name, data: self.reports.update({name: data}),
+                                            output=types.SimpleNamespace(info=lambda message: None))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_pack(self):
+        QtConan._pack_split_dwarf(self.recipe, self.package)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.package, "lib"))), ["libQt6Core.so.6", "libQt6Core.so.6.10.0", "libQt6Core.so.6.10.0.dwp", "libQt6Gui.so.6.10.0"])
+        sections = subprocess.run(["objdump", "-h", self.library + ".dwp"], capture_output=True, text=True, check=True).stdout
+        self.assertIn(".debug_info.dwo", sections)
+        # packed again (e.g. a stage that already contains them)
+        QtConan._pack_split_dwarf(self.recipe, self.package)
+
+    def test_separate_debug_info(self):
+        QtConan._pack_split_dwarf(self.recipe, self.package)
+        QtConan._separate_debug_info(self.recipe)
+        # gdb looks for <file>.dwp in its debug-file-directory
+        self.assertTrue(os.path.isfile(os.path.join(self.recipe.package_metadata_folder, "debug", "libQt6Core.so.6.10.0.dwp")))
+        self.assertFalse(os.path.exists(self.library + ".dwp"))
+        self.assertEqual(self.reports["debug_info"]["files"]["lib/libQt6Core.so.6.10.0.dwp"]["debug_file"], "debug/libQt6Core.so.6.10.0.dwp")
+        self.assertTrue(os.path.isfile(os.path.join(self.recipe.package_metadata_folder, self.reports["debug_info"]["files"]["lib/libQt6Core.so.6.10.0"]["debug_file"])))
+
+if __name__ == "__main__":
+    unittest.main()
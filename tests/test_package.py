@@ -0,0 +1,94 @@
+import os
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+
+import yaml
+
+# The recipe reads info.json and qtmodules/ relative to the working directory when it is loaded
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+from conanfile import QtConan, mkspecfiles, readqttargets
+
+# Excerpt of an installed Qt: the CMake target exports and the mkspecs of a device build
+PACKAGE = os.path.join(ROOT, "tests", "fixtures", "package")
+
+class ReadQtTargetsTest(unittest.TestCase):
+    def setUp(self):
+        self.targets = readqttargets(PACKAGE)
+
+    def test_targets(self):
+        self.assertEqual(sorted(self.targets), ["Core", "Gui", "Platform"])
+        self.assertEqual(self.targets["Core"]["type"], "SHARED")
+        self.assertEqual(self.targets["Gui"]["type"], "STATIC")
+        self.assertEqual(self.targets["Platform"]["type"], "INTERFACE")
+
+    def test_location_from_the_configuration_file(self):
+        self.assertEqual(self.targets["Core"]["location"], "lib/libQt6Core.so.6.10.0")
+        self.assertEqual(self.targets["Gui"]["location"], "lib/libQt6Gui.a")
+        self.assertIsNone(self.targets["Platform"]["location"])
+
+    def test_interface(self):
+        self.assertEqual(self.targets["Platform"]["includedirs"], ["mkspecs/devices/linux-rasp-pi4-aarch64", "include"])
+        self.assertEqual(self.targets["Core"]["includedirs"], ["include/QtCore", "include"])
+        # generator expressions other than $<LINK_ONLY:...> are dropped
+        self.assertEqual(self.targets["Core"]["defines"], ["QT_CORE_LIB"])
+        self.assertEqual(self.targets["Core"]["requires"], ["Platform"])
+        self.assertEqual(self.targets["Core"]["system_libs"], ["dl"])
+        self.assertEqual(self.targets["Gui"]["requires"], ["Core", "BundledHarfbuzz"])
+        self.assertEqual(self.targets["Gui"]["system_libs"], ["m"])
+
+class MkspecFilesTest(unittest.TestCase):
+    def test_includes_followed(self):
+        self.assertEqual(mkspecfiles(PACKAGE, "mkspecs/devices/linux-rasp-pi4-aarch64"), {
+            "mkspecs/devices/linux-rasp-pi4-aarch64/qmake.conf",
+            "mkspecs/devices/linux-rasp-pi4-aarch64/qplatformdefs.h",
+            # include(...) of qmake.conf and the files they include
+            "mkspecs/devices/common/linux_device_pre.conf",
+            "mkspecs/devices/common/linux_arm_device_post.conf",
+            "mkspecs/devices/common/linux_device_post.conf",
+            "mkspecs/common/linux.conf",
+            "mkspecs/common/gcc-base-unix.conf",
+            # #include "..." of qplatformdefs.h
+            "mkspecs/linux-g++/qplatformdefs.h",
+            "mkspecs/common/posix/qplatformdefs.h",
+        })
+
+    def test_missing_mkspec(self):
+        self.assertEqual(mkspecfiles(PACKAGE, "mkspecs/linux-foo"), set())
+
+class PruneTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        shutil.copytree(PACKAGE, os.path.join(self.folder, "p"))
+        with open(os.path.join(ROOT, "conandata.yml"), 'r') as f:
+            conan_data = yaml.safe_load(f)
+        self.reports = {}
+        self.recipe = types.SimpleNamespace(conan_data=conan_data, package_folder=os.path.join(self.folder, "p"),
+                                            _write_report=lambda name, data: self.reports.update({name: data}),
+                                            output=types.SimpleNamespace(info=lambda message: None))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def prune(self, shared):
+        self.recipe.get_option = lambda name: {"shared": shared}[name]
+        QtConan._prune(self.recipe)
+        return set(self.reports["pruned"]["files"])
+
+    def test_static(self):
+        removed = self.prune(shared=False)
+        # mkspecs/common is allowed in conandata.yml, of the other mkspecs only the files of the Qt6::Platform mkspec are kept
+        self.assertEqual(removed, {"mkspecs/devices/common/linux_arm_device_pre.conf", "mkspecs/linux-clang/qmake.conf", "mkspecs/linux-g++/qmake.conf"})
+        self.assertTrue(os.path.isfile(os.path.join(self.recipe.package_folder, "lib", "libQt6Gui.prl")))
+        self.assertFalse(os.path.exists(os.path.join(self.recipe.package_folder, "mkspecs", "linux-clang")))
+
+    def test_shared(self):
+        self.assertIn("lib/libQt6Gui.prl", self.prune(shared=True))
+
+if __name__ == "__main__":
+    unittest.main()
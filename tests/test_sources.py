@@ -0,0 +1,162 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import types
+import unittest
+
+# The recipe reads info.json and qtmodules/ relative to the working directory when it is loaded
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+from conan.errors import ConanException
+from conanfile import QtConan, extractsources
+
+def maketarball(path, members):
+    # Writes a tar.xz with the root folder of the Qt source tarball. members: (name, content) for files,
+    # (name, None) for folders and (name, ("link", target)) / (name, ("symlink", target)) for links.
+    with tarfile.open(path, mode="w:xz") as tar:
+        root = tarfile.TarInfo("qt-everywhere-src-6.10.0")
+        root.type = tarfile.DIRTYPE
+        tar.addfile(root)
+        for name, content in members:
+            info = tarfile.TarInfo("qt-everywhere-src-6.10.0/" + name)
+            if content is None:
+                info.type = tarfile.DIRTYPE
+                tar.addfile(info)
+            elif isinstance(content, tuple):
+                info.type = tarfile.LNKTYPE if content[0] == "link" else tarfile.SYMTYPE
+                info.linkname = ("qt-everywhere-src-6.10.0/" if content[0] == "link" else "") + content[1]
+                tar.addfile(info)
+            else:
+                info.size = len(content)
+                tar.addfile(info, io.BytesIO(content))
+
+SOURCES = [
+    ("CMakeLists.txt", b"project(Qt)\n"),
+    ("qtbase", None),
+    ("qtbase/CMakeLists.txt", b"qtbase\n"),
+    ("qtbase/LICENSE", ("link", "qtbase/CMakeLists.txt")),
+    ("qtsvg", None),
+    ("qtsvg/CMakeLists.txt", b"qtsvg\n"),
+]
+
+class ExtractSourcesTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.tarball = os.path.join(self.folder, "qt.tar.xz")
+        maketarball(self.tarball, SOURCES)
+        self.destination = os.path.join(self.folder, "Qt")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_skip_dirs(self):
+        report = extractsources(self.tarball, self.destination, {"qtsvg"})
+        self.assertTrue(os.path.isfile(os.path.join(self.destination, "CMakeLists.txt")))
+        self.assertTrue(os.path.isfile(os.path.join(self.destination, "qtbase", "LICENSE")))
+        self.assertFalse(os.path.exists(os.path.join(self.destination, "qtsvg")))
+        self.assertEqual(report["files"], 2)
+        self.assertEqual(report["bytes_skipped"], len(b"qtsvg\n"))
+
+    def test_only_dirs_renamed(self):
+        extractsources(self.tarball, self.destination, only_dirs={"qtbase": ".qtbase.tmp"})
+        self.assertEqual(sorted(os.listdir(self.destination)), [".qtbase.tmp"])
+        with open(os.path.join(self.destination, ".qtbase.tmp", "LICENSE"), 'rb') as f:
+            self.assertEqual(f.read(), b"qtbase\n") # the hard link target is renamed as well
+
+    def test_refuses_traversal(self):
+        maketarball(self.tarball, [("qtbase/../../evil", b"")])
+        with self.assertRaises(ConanException):
+            extractsources(self.tarball, self.destination)
+
+    @unittest.skipUnless(hasattr(tarfile, "data_filter"), "tarfile has no extraction filters")
+    def test_refuses_link_out_of_destination(self):
+        maketarball(self.tarball, [("qtbase", None), ("qtbase/escape", ("symlink", "../../../etc/passwd"))])
+        with self.assertRaises(ConanException):
+            extractsources(self.tarball, self.destination)
+
+class ExtractModulesTest(unittest.TestCase):
+    # build() extracts the modules source() skipped (user.qt:selective_source) into the shared source folder
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        tarball = os.path.join(self.folder, "qt.tar.xz")
+        maketarball(tarball, SOURCES)
+        os.makedirs(os.path.join(self.folder, "Qt"))
+        self.patched = []
+        self.recipe = types.SimpleNamespace(source_folder=self.folder, version="6.10.0", conan_data={"sources": {"6.10.0": {}}},
+                                            output=types.SimpleNamespace(info=lambda message: None),
+                                            _download=lambda source: (tarball, {}),
+                                            _patch_module=lambda module, folder: self.patched.append((module, os.path.isdir(folder))))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_extract_modules(self):
+        QtConan._extract_modules(self.recipe, ["qtbase", "qtsvg"])
+        self.assertEqual(sorted(os.listdir(os.path.join(self.folder, "Qt"))), ["qtbase", "qtsvg"])
+        self.assertEqual(self.patched, [("qtbase", True), ("qtsvg", True)]) # patched before they are moved into place
+
+    def test_extracted_concurrently(self):
+        os.makedirs(os.path.join(self.folder, "Qt", "qtsvg", "src"))
+        QtConan._extract_modules(self.recipe, ["qtsvg"])
+        self.assertEqual(os.listdir(os.path.join(self.folder, "Qt")), ["qtsvg"])
+        self.assertEqual(os.listdir(os.path.join(self.folder, "Qt", "qtsvg")), ["src"])
+
+    def test_patch_module(self):
+        folder = os.path.join(self.folder, ".qtbase.tmp")
+        os.makedirs(folder)
+        with open(os.path.join(folder, "CMakeLists.txt"), 'w') as f:
+            f.write("qtbase\n")
+        recipe = types.SimpleNamespace(output=self.recipe.output, _patches=[{"replace_in_file": "Qt/qtbase/CMakeLists.txt", "search": "qtbase", "replace": "patched"},
+                                                 {"replace_in_file": "Qt/qtsvg/CMakeLists.txt", "search": "qtsvg", "replace": "patched"}])
+        QtConan._patch_module(recipe, "qtbase", folder)
+        with open(os.path.join(folder, "CMakeLists.txt"), 'r') as f:
+            self.assertEqual(f.read(), "patched\n")
+
+    def test_unknown_module(self):
+        with self.assertRaises(ConanException):
+            QtConan._extract_modules(self.recipe, ["qtfoo"])
+        self.assertEqual(os.listdir(os.path.join(self.folder, "Qt")), [])
+
+@unittest.skipUnless(shutil.which("conan"), "conan is not installed")
+class SelectiveSourceTest(unittest.TestCase):
+    # Runs the recipe's source() with user.qt:selective_source, which must not access the options
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.recipe = os.path.join(self.folder, "recipe")
+        shutil.copytree(ROOT, self.recipe, ignore=shutil.ignore_patterns(".git", "tests", "Qt", "build", "__pycache__"))
+        with open(os.path.join(ROOT, "conandata.yml"), 'r') as f:
+            path = [line.split('"')[1] for line in f if "qt-everywhere-src-6.10.0.tar.xz" in line][0]
+        tarball = os.path.join(self.folder, "mirror", path)
+        os.makedirs(os.path.dirname(tarball))
+        maketarball(tarball, SOURCES)
+        with open(tarball, 'rb') as f:
+            sha256 = hashlib.sha256(f.read()).hexdigest()
+        self.cache = os.path.join(self.folder, "cache")
+        os.makedirs(os.path.join(self.cache, "artifacts", "index"))
+        with open(os.path.join(self.cache, "artifacts", "index", os.path.basename(path) + ".sha256"), 'w') as f:
+            f.write(sha256)
+        # conan source only reads the conf from the global.conf
+        self.home = os.path.join(self.folder, "home")
+        os.makedirs(self.home)
+        with open(os.path.join(self.home, "global.conf"), 'w') as f:
+            f.write("user.qt:selective_source=True\nuser.qt:mirrors=['file://%s']\nuser.qt:cache_folder=%s\n" % (os.path.join(self.folder, "mirror"), self.cache))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_source(self):
+        subprocess.run(["conan", "source", "."], cwd=self.recipe, env=dict(os.environ, CONAN_HOME=self.home), check=True, capture_output=True)
+        self.assertEqual(os.listdir(os.path.join(self.recipe, "Qt")), ["CMakeLists.txt"])
+        with open(os.path.join(self.recipe, "extract_report.json"), 'r') as f:
+            self.assertEqual(json.load(f)["files"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
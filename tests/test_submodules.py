@@ -0,0 +1,47 @@
+import os
+import sys
+import unittest
+
+# The recipe reads info.json and qtmodules/ relative to the working directory when it is loaded
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+from conan.errors import ConanException
+from conanfile import parsesubmodules, resolvesubmodules
+
+class ResolveSubmodulesTest(unittest.TestCase):
+    def setUp(self):
+        with open(os.path.join(ROOT, "tests", "fixtures", "gitmodules"), 'r') as f:
+            submodules = parsesubmodules(f.read())
+        # Same filter as getsubmodules()
+        self.submodules = {name: module for name, module in submodules.items() if module["status"] not in ["obsolete", "ignore"]}
+
+    def test_closure_in_build_order(self):
+        order, unknown = resolvesubmodules(self.submodules, ["qtgraphs"])
+        self.assertEqual(set(order), {"qtbase", "qtdeclarative", "qtshadertools", "qtquick3d", "qtgraphs"})
+        for module in order:
+            for dependency in self.submodules[module]["depends"]:
+                self.assertLess(order.index(dependency), order.index(module))
+        self.assertEqual(unknown, [])
+
+    def test_minimal_closure(self):
+        order, _ = resolvesubmodules(self.submodules, ["qtsvg"])
+        self.assertEqual(order, ["qtbase", "qtsvg"])
+
+    def test_unavailable_dependency(self):
+        order, unknown = resolvesubmodules(self.submodules, ["qtwebview"])
+        self.assertEqual(order, ["qtbase", "qtdeclarative", "qtwebview"])
+        self.assertEqual(unknown, ["qtwebkit"])
+
+    def test_unknown_module(self):
+        with self.assertRaises(ConanException):
+            resolvesubmodules(self.submodules, ["qtwebkit"])
+
+    def test_cycle(self):
+        self.submodules["qtbase"]["depends"] = ["qtquick3d"]
+        with self.assertRaisesRegex(ConanException, "Cyclic"):
+            resolvesubmodules(self.submodules, ["qtsvg"])
+
+if __name__ == "__main__":
+    unittest.main()